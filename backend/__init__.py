@@ -5,17 +5,24 @@ from pathlib import Path
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from flask_compress import Compress
 from flask_jwt_extended import JWTManager
 
-from .config import Config
+from .config import Config, engine_options_for
 from .database import db
+from .json_provider import ORJSONProvider
 
 jwt = JWTManager()
+compress = Compress()
 
 
 def create_app(config_class: type[Config] | None = None) -> Flask:
     """Application factory used by both run.py and tests."""
     app = Flask(__name__, instance_relative_config=True)
+    app.json = ORJSONProvider(app)
+    # Keep response key order and never pretty-print (Flask 2.3 provider settings)
+    app.json.sort_keys = False
+    app.json.compact = True
 
     # Ensure the instance folder exists for the SQLite database.
     try:
@@ -24,6 +31,10 @@ def create_app(config_class: type[Config] | None = None) -> Flask:
         pass
 
     app.config.from_object(config_class or Config())
+    # Pool settings depend on the final database URI; a config may still set its own
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS", engine_options_for(app.config["SQLALCHEMY_DATABASE_URI"])
+    )
 
     # CORS: allow requests from configured frontend origin
     frontend_origin = app.config.get("FRONTEND_ORIGIN") or os.getenv("FRONTEND_ORIGIN", "http://localhost:5173")
@@ -49,6 +60,7 @@ def create_app(config_class: type[Config] | None = None) -> Flask:
     )
     db.init_app(app)
     jwt.init_app(app)
+    compress.init_app(app)
 
     # Register blueprints lazily to avoid circular imports.
     from .routes import register_blueprints
@@ -4,6 +4,24 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from sqlalchemy.engine import make_url
+
+
+def engine_options_for(database_uri: str) -> dict[str, object]:
+    """Engine options for a database URI: reuse pooled connections and drop stale ones.
+
+    In-memory SQLite runs on a StaticPool, which takes no pool sizing.
+    """
+    options: dict[str, object] = {"pool_pre_ping": True, "pool_recycle": 1800}
+    url = make_url(database_uri)
+    in_memory_sqlite = url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+    if not in_memory_sqlite:
+        options["pool_size"] = int(os.environ.get("DB_POOL_SIZE", 10))
+        options["max_overflow"] = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+    return options
+
 
 class Config:
     """Default configuration for the minimal Flask backend."""
@@ -16,7 +34,11 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=12)
+    # Compress JSON responses larger than 1KB (Brotli when the client supports it)
+    COMPRESS_MIMETYPES = ["application/json"]
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_ALGORITHM = ["br", "gzip"]
     FRONTEND_ORIGIN = os.environ.get("FRONTEND_ORIGIN", "http://localhost:5173")
 
 
-__all__ = ["Config"]
+__all__ = ["Config", "engine_options_for"]
@@ -0,0 +1,33 @@
+"""orjson-backed JSON provider for Flask responses and request bodies."""
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Any
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Drop-in replacement for Flask's JSON provider that encodes/decodes with orjson."""
+
+    @staticmethod
+    def default(o: Any) -> Any:
+        # orjson only serializes real dicts; read-only views are used for shared defaults
+        if isinstance(o, MappingProxyType):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
+__all__ = ["ORJSONProvider"]
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta
 
+import orjson
+
 from .database import db
 
 
@@ -18,7 +20,12 @@ class User(db.Model):
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
     password = db.Column(db.String(255), nullable=False)  # Stores hashed password
     display_name = db.Column(db.String(255), nullable=True)  # User's full name
-    prof_pic_url = db.Column(db.Text)
+    prof_pic_url = db.Column(db.Text)  # URL of the stored picture (legacy rows may hold a data URL)
+    # Raw profile picture bytes; deferred so ordinary User loads never read the image
+    prof_pic_mime = db.deferred(db.Column(db.String(32), nullable=True), group="profile_picture")
+    prof_pic_blob = db.deferred(db.Column(db.LargeBinary, nullable=True), group="profile_picture")
+    # Random per-upload token that the picture URL must carry to be served
+    prof_pic_token = db.deferred(db.Column(db.String(32), nullable=True), group="profile_picture")
     settings = db.Column(db.JSON)  # MySQL: JSON, SQLite: TEXT with JSON serialization
     settings_updated_at = db.Column(db.DateTime, nullable=True, index=True)  # Track when settings last changed
     is_active = db.Column(db.Boolean, default=True)
@@ -102,6 +109,7 @@ class PublicKey(db.Model):
         db.Integer,
         db.ForeignKey("user.userID", ondelete="CASCADE", onupdate="CASCADE"),
         nullable=False,
+        unique=True,  # One key per user; register_public_key rejects duplicates
         index=True,
     )
     publicKey = db.Column(db.Text, nullable=False)
@@ -113,6 +121,9 @@ class PublicKey(db.Model):
     private_key_salt = db.Column(db.String(64), nullable=True)  # Hex-encoded salt for PBKDF2
     private_key_iv = db.Column(db.String(64), nullable=True)  # Hex-encoded IV for AES
 
+    # Serialized to_dict(), refreshed on register/rotate so reads skip re-encoding
+    public_key_json = db.Column(db.Text, nullable=True)
+
     # Relationships
     user = db.relationship("User", back_populates="public_keys")
 
@@ -125,6 +136,14 @@ class PublicKey(db.Model):
             "createdAt": self.created_at.isoformat() if self.created_at else None,
         }
 
+    def refresh_json(self) -> None:
+        """Re-materialize public_key_json from the current column values."""
+        self.public_key_json = orjson.dumps(self.to_dict()).decode()
+
+    def to_json(self) -> str:
+        """Serialized to_dict(); falls back to encoding rows saved before the column existed."""
+        return self.public_key_json or orjson.dumps(self.to_dict()).decode()
+
 
 # ============================================================================
 # 3. USER_SESSION Table (Depends on USER)
@@ -381,7 +400,7 @@ class Message(db.Model):
     saved_by_sender = db.Column(db.Boolean, default=False, nullable=False, index=True)
     saved_by_receiver = db.Column(db.Boolean, default=False, nullable=False, index=True)
     # Timer reset: When a user unsaves a message, reset the deletion timer from this timestamp
-    timer_reset_at = db.Column(db.DateTime, nullable=True, index=True)
+    timer_reset_at = db.Column(db.DateTime, nullable=True)
 
     # Per-user soft delete (each user controls when message disappears for them)
     deleted_for_sender = db.Column(db.Boolean, default=False, nullable=False, index=True)
@@ -400,6 +419,37 @@ class Message(db.Model):
         index=True,
     )
 
+    # Composite index for per-group timeline lookups (latest messages first), and a
+    # partial index so cleanup finds messages deleted for both users without a scan
+    __table_args__ = (
+        db.Index("ix_message_group_timestamp", groupChatID, timeStamp.desc()),
+        # Most rows never have a timer reset, so the index leaves NULLs out
+        db.Index(
+            "ix_message_timer_reset_at",
+            timer_reset_at,
+            sqlite_where=timer_reset_at.isnot(None),
+            postgresql_where=timer_reset_at.isnot(None),
+        ),
+        db.Index(
+            "ix_message_fully_deleted",
+            msgID,
+            sqlite_where=db.and_(deleted_for_sender == True, deleted_for_receiver == True),
+            postgresql_where=db.and_(deleted_for_sender == True, deleted_for_receiver == True),
+        ),
+        # 1-1 messages still visible to at least one user, walked by msgID during cleanup.
+        # Queries must repeat this predicate verbatim for SQLite to use the index.
+        db.Index(
+            "ix_message_live_direct",
+            msgID,
+            sqlite_where=db.and_(
+                groupChatID.is_(None), db.not_(db.and_(deleted_for_sender == True, deleted_for_receiver == True))
+            ),
+            postgresql_where=db.and_(
+                groupChatID.is_(None), db.not_(db.and_(deleted_for_sender == True, deleted_for_receiver == True))
+            ),
+        ),
+    )
+
     # Relationships
     sender = db.relationship("User", foreign_keys=[senderID], back_populates="sent_messages")
     receiver = db.relationship(
@@ -502,7 +552,6 @@ class GroupMessageStatus(db.Model):
     """Tracks per-user status for group messages (read, saved, deleted)."""
 
     __tablename__ = "group_message_status"
-    __table_args__ = (db.PrimaryKeyConstraint("msgID", "userID"),)
 
     msgID = db.Column(
         db.Integer,
@@ -518,7 +567,24 @@ class GroupMessageStatus(db.Model):
     saved_by_user = db.Column(db.Boolean, default=False, nullable=False)
     deleted_for_user = db.Column(db.Boolean, default=False, nullable=False)
     # Timer reset: When a user unsaves a message, reset the deletion timer from this timestamp
-    timer_reset_at = db.Column(db.DateTime, nullable=True, index=True)
+    timer_reset_at = db.Column(db.DateTime, nullable=True)
+
+    # Composite key plus a partial index for "is this message saved by anyone" lookups
+    __table_args__ = (
+        db.PrimaryKeyConstraint("msgID", "userID"),
+        db.Index(
+            "ix_group_message_status_timer_reset_at",
+            timer_reset_at,
+            sqlite_where=timer_reset_at.isnot(None),
+            postgresql_where=timer_reset_at.isnot(None),
+        ),
+        db.Index(
+            "ix_group_message_status_saved",
+            msgID,
+            sqlite_where=saved_by_user == True,
+            postgresql_where=saved_by_user == True,
+        ),
+    )
 
     # Relationships
     message = db.relationship("Message", backref=db.backref("group_statuses", cascade="all, delete-orphan"))
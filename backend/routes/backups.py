@@ -8,7 +8,7 @@ from flask_jwt_extended import get_jwt_identity, jwt_required
 
 from ..database import db
 from ..models import Message, User, GroupMessageStatus, GroupChat, GroupMember
-from ..websocket_helper import emit_message_saved, emit_group_message_saved
+from ..websocket_helper import emit_message_saved, emit_group_message_saved_bulk
 
 backups_bp = Blueprint("backups", __name__)
 
@@ -142,13 +142,12 @@ def delete_backup(message_id: int):
         # Emit WebSocket event to notify all group members about the unstar
         group = GroupChat.query.get(message.groupChatID)
         if group:
-            for member in group.members:
-                emit_group_message_saved(member.userID, {
-                    "groupChatID": message.groupChatID,
-                    "messageId": message_id,
-                    "saved": False,
-                    "savedBy": current_user_id,
-                })
+            emit_group_message_saved_bulk([member.userID for member in group.members], {
+                "groupChatID": message.groupChatID,
+                "messageId": message_id,
+                "saved": False,
+                "savedBy": current_user_id,
+            })
 
         return jsonify({
             "message": "Message removed from backups for all members.",
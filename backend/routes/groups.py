@@ -3,24 +3,28 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, g, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
-from sqlalchemy import or_, and_
+from sqlalchemy import case, func, or_, and_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import defer, joinedload, selectinload
 
 from ..database import db
 from ..models import GroupChat, GroupMember, Message, User, GroupMessageStatus, Contact
 from .conversations import check_message_rate_limit
 from ..websocket_helper import (
-    emit_group_created,
-    emit_group_message,
-    emit_group_member_added,
+    emit_group_created_for_members,
+    emit_group_message_bulk,
+    emit_group_member_added_bulk,
     emit_group_member_removed,
-    emit_group_deleted,
-    emit_group_message_edited,
-    emit_group_message_unsent,
+    emit_group_member_removed_bulk,
+    emit_group_deleted_bulk,
+    emit_group_message_edited_bulk,
+    emit_group_message_unsent_bulk,
     emit_group_message_read,
     emit_group_key_rotated,
     emit_group_message_saved,
+    emit_group_message_saved_bulk,
 )
 
 groups_bp = Blueprint("groups", __name__)
@@ -28,29 +32,49 @@ groups_bp = Blueprint("groups", __name__)
 MAX_GROUP_MEMBERS = 32
 DEFAULT_RETENTION_HOURS = 72
 
-
-def _current_user_id() -> int:
-    """Get current user ID from JWT token."""
-    user_id = get_jwt_identity()
-    return int(user_id)
+# Dialects that support INSERT ... ON CONFLICT for status upserts
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
 
 
-def _get_user_retention_hours(user: User) -> float:
-    """Get user's message retention hours from settings, or default."""
-    if user and user.settings and "messageRetentionHours" in user.settings:
-        return float(user.settings["messageRetentionHours"])
-    return DEFAULT_RETENTION_HOURS
+def _current_user_id() -> int:
+    """Get current user ID from JWT token (cached for the request)."""
+    user_id = getattr(g, "_current_user_id", None)
+    if user_id is None:
+        user_id = int(get_jwt_identity())
+        g._current_user_id = user_id
+    return user_id
+
+
+def _get_group_max_retention_hours(group_id: int) -> float:
+    """Get the largest message retention hours across group members, or default."""
+    max_hours = (
+        db.session.query(func.max(User.settings["messageRetentionHours"].as_float()))
+        .select_from(GroupMember)
+        .join(User, User.userID == GroupMember.userID)
+        .filter(GroupMember.groupChatID == group_id)
+        .scalar()
+    )
+    if max_hours is None:
+        return DEFAULT_RETENTION_HOURS
+    return max(DEFAULT_RETENTION_HOURS, float(max_hours))
 
 
 def _is_group_member(group_id: int, user_id: int) -> bool:
     """Check if user is a member of the group."""
-    return GroupMember.query.filter_by(groupChatID=group_id, userID=user_id).first() is not None
+    return _get_member_role(group_id, user_id) is not None
 
 
 def _get_member_role(group_id: int, user_id: int) -> str | None:
-    """Get the role of a user in a group."""
-    member = GroupMember.query.filter_by(groupChatID=group_id, userID=user_id).first()
-    return member.role if member else None
+    """Get the role of a user in a group (memoized for the request)."""
+    roles = g.setdefault("_member_roles", {})
+    key = (group_id, user_id)
+    if key not in roles:
+        member = GroupMember.query.filter_by(groupChatID=group_id, userID=user_id).first()
+        roles[key] = member.role if member else None
+    return roles[key]
 
 
 def _is_owner(group_id: int, user_id: int) -> bool:
@@ -58,6 +82,110 @@ def _is_owner(group_id: int, user_id: int) -> bool:
     return _get_member_role(group_id, user_id) == "Owner"
 
 
+def _load_group_for_user(group_id: int, user_id: int) -> tuple[GroupChat | None, str | None]:
+    """Load a group together with the user's role in it (None if not a member)."""
+    row = (
+        db.session.query(GroupChat, GroupMember.role)
+        .outerjoin(
+            GroupMember,
+            and_(
+                GroupMember.groupChatID == GroupChat.groupChatID,
+                GroupMember.userID == user_id,
+            ),
+        )
+        .filter(GroupChat.groupChatID == group_id)
+        .first()
+    )
+    if row is None:
+        return None, None
+    group, role = row
+    g.setdefault("_member_roles", {})[(group_id, user_id)] = role
+    return group, role
+
+
+def _get_group_member_ids(group_id: int) -> list[int]:
+    """Get the user IDs of a group's members for notification fan-out (one indexed query)."""
+    return [
+        user_id for (user_id,) in db.session.query(GroupMember.userID).filter_by(groupChatID=group_id)
+    ]
+
+
+def _upsert_group_status(message_id: int, user_id: int, *, only_if_unread: bool = False, **values) -> bool:
+    """
+    Insert or update a user's status row for a group message in one statement.
+
+    With only_if_unread, an existing row is only updated while its read_at is NULL.
+    Returns True if a row was inserted or updated.
+    """
+    insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if insert is None:
+        # No ON CONFLICT support: fall back to get-or-create
+        status = db.session.get(GroupMessageStatus, (message_id, user_id))
+        if not status:
+            db.session.add(GroupMessageStatus(msgID=message_id, userID=user_id, **values))
+            return True
+        if only_if_unread and status.read_at:
+            return False
+        for key, value in values.items():
+            setattr(status, key, value)
+        return True
+
+    stmt = insert(GroupMessageStatus).values(msgID=message_id, userID=user_id, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["msgID", "userID"],
+        set_={key: stmt.excluded[key] for key in values},
+        where=GroupMessageStatus.read_at.is_(None) if only_if_unread else None,
+    )
+    return db.session.execute(stmt).rowcount > 0
+
+
+def _store_encrypted_group_keys(group_id: int, encrypted_keys: dict) -> None:
+    """Write each member's encrypted group key with a single UPDATE ... CASE statement."""
+    keys_by_user: dict[int, str] = {}
+    for user_id_str, encrypted_key in encrypted_keys.items():
+        try:
+            keys_by_user[int(user_id_str)] = encrypted_key
+        except ValueError:
+            continue
+
+    if not keys_by_user:
+        return
+
+    db.session.execute(
+        update(GroupMember)
+        .where(
+            GroupMember.groupChatID == group_id,
+            GroupMember.userID.in_(keys_by_user),
+        )
+        .values(encrypted_group_key=case(keys_by_user, value=GroupMember.userID))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _get_last_visible_message(group_id: int, user_id: int) -> Message | None:
+    """Get the latest non-expired, non-unsent group message not deleted for the user."""
+    return (
+        Message.query.outerjoin(
+            GroupMessageStatus,
+            and_(
+                GroupMessageStatus.msgID == Message.msgID,
+                GroupMessageStatus.userID == user_id,
+            ),
+        )
+        .filter(
+            Message.groupChatID == group_id,
+            Message.expiryTime > datetime.utcnow(),
+            Message.is_unsent == False,
+            or_(
+                GroupMessageStatus.msgID.is_(None),
+                GroupMessageStatus.deleted_for_user == False,
+            ),
+        )
+        .order_by(Message.timeStamp.desc())
+        .first()
+    )
+
+
 # ============================================================================
 # GROUP CRUD ENDPOINTS
 # ============================================================================
@@ -152,16 +280,13 @@ def create_group():
 
     db.session.commit()
 
-    # Notify all members about the new group
+    # Notify all members about the new group, including each member's encrypted group key
     group_data = group.to_dict(include_members=True)
-    for member_id in member_ids:
-        if member_id != current_user_id:
-            # Include the member's encrypted group key in the notification
-            member_data = {
-                **group_data,
-                "encryptedGroupKey": encrypted_keys.get(str(member_id)),
-            }
-            emit_group_created(member_id, member_data)
+    emit_group_created_for_members(
+        [member_id for member_id in member_ids if member_id != current_user_id],
+        group_data,
+        encrypted_keys,
+    )
 
     return jsonify({
         "message": "Group created successfully.",
@@ -185,27 +310,7 @@ def list_groups():
             continue
 
         # Get last non-deleted, non-unsent message for this group
-        # Need to iterate to find one that isn't deleted for this user
-        messages = (
-            Message.query.filter(
-                Message.groupChatID == group.groupChatID,
-                Message.expiryTime > datetime.utcnow(),
-                Message.is_unsent == False,
-            )
-            .order_by(Message.timeStamp.desc())
-            .limit(20)  # Check up to 20 recent messages
-            .all()
-        )
-
-        last_message = None
-        for msg in messages:
-            status = GroupMessageStatus.query.filter_by(
-                msgID=msg.msgID,
-                userID=current_user_id
-            ).first()
-            if not status or not status.deleted_for_user:
-                last_message = msg
-                break
+        last_message = _get_last_visible_message(group.groupChatID, current_user_id)
 
         groups.append({
             **group.to_dict(include_members=True),
@@ -227,11 +332,11 @@ def get_group(group_id: int):
     """Get group details including members."""
     current_user_id = _current_user_id()
 
-    group = GroupChat.query.get(group_id)
+    group, role = _load_group_for_user(group_id, current_user_id)
     if not group:
         return jsonify({"message": "Group not found."}), 404
 
-    if not _is_group_member(group_id, current_user_id):
+    if role is None:
         return jsonify({"message": "You are not a member of this group."}), 403
 
     membership = GroupMember.query.filter_by(
@@ -258,11 +363,11 @@ def update_group(group_id: int):
     """
     current_user_id = _current_user_id()
 
-    group = GroupChat.query.get(group_id)
+    group, role = _load_group_for_user(group_id, current_user_id)
     if not group:
         return jsonify({"message": "Group not found."}), 404
 
-    if not _is_owner(group_id, current_user_id):
+    if role != "Owner":
         return jsonify({"message": "Only the owner can update the group."}), 403
 
     payload = request.get_json(silent=True) or {}
@@ -278,15 +383,16 @@ def update_group(group_id: int):
     db.session.commit()
 
     # Notify all members about the group update
-    from backend.websocket_helper import emit_group_updated
+    from backend.websocket_helper import emit_group_updated_bulk
     update_data = {
         "groupChatID": group_id,
         "groupName": group.groupName,
         "profilePicUrl": group.profile_pic_url,
     }
-    for member in group.members:
-        if member.userID != current_user_id:
-            emit_group_updated(member.userID, update_data)
+    emit_group_updated_bulk(
+        [member.userID for member in group.members if member.userID != current_user_id],
+        update_data,
+    )
 
     return jsonify({
         "message": "Group updated successfully.",
@@ -304,11 +410,11 @@ def delete_group(group_id: int):
     """
     current_user_id = _current_user_id()
 
-    group = GroupChat.query.get(group_id)
+    group, role = _load_group_for_user(group_id, current_user_id)
     if not group:
         return jsonify({"message": "Group not found."}), 404
 
-    if not _is_owner(group_id, current_user_id):
+    if role != "Owner":
         return jsonify({"message": "Only the owner can delete the group."}), 403
 
     # Get all member IDs before deleting
@@ -336,13 +442,12 @@ def delete_group(group_id: int):
         # This will unstar the message in chat and remove it from their backup folders
         saved_message_ids = set(s.msgID for s in saved_statuses)
         for message_id in saved_message_ids:
-            for member_id in member_ids:
-                emit_group_message_saved(member_id, {
-                    "groupChatID": group_id,
-                    "messageId": message_id,
-                    "saved": False,
-                    "savedBy": current_user_id,  # Owner initiated the deletion
-                })
+            emit_group_message_saved_bulk(member_ids, {
+                "groupChatID": group_id,
+                "messageId": message_id,
+                "saved": False,
+                "savedBy": current_user_id,  # Owner initiated the deletion
+            })
 
     # Delete GroupMessageStatus records (to avoid FK constraint)
     if message_ids:
@@ -353,9 +458,10 @@ def delete_group(group_id: int):
     db.session.commit()
 
     # Notify all members about group deletion
-    for member_id in member_ids:
-        if member_id != current_user_id:
-            emit_group_deleted(member_id, {"groupChatID": group_id})
+    emit_group_deleted_bulk(
+        [member_id for member_id in member_ids if member_id != current_user_id],
+        {"groupChatID": group_id},
+    )
 
     return jsonify({"message": "Group deleted successfully."}), 200
 
@@ -376,11 +482,11 @@ def add_members(group_id: int):
     """
     current_user_id = _current_user_id()
 
-    group = GroupChat.query.get(group_id)
+    group, role = _load_group_for_user(group_id, current_user_id)
     if not group:
         return jsonify({"message": "Group not found."}), 404
 
-    if not _is_owner(group_id, current_user_id):
+    if role != "Owner":
         return jsonify({"message": "Only the owner can add members."}), 403
 
     payload = request.get_json(silent=True) or {}
@@ -395,15 +501,21 @@ def add_members(group_id: int):
     if current_count + len(member_ids) > MAX_GROUP_MEMBERS:
         return jsonify({"message": f"Maximum {MAX_GROUP_MEMBERS} members allowed."}), 400
 
+    # Look up existing members and candidate users once instead of per member
+    existing_ids = {member.userID for member in group.members}
+    users_by_id = {
+        user.userID: user
+        for user in User.query.filter(User.userID.in_(member_ids)).all()
+    }
+
     added_members = []
     for member_id in member_ids:
-        # Check if already a member
-        if _is_group_member(group_id, member_id):
+        # Check if already a member (or already added by this request)
+        if member_id in existing_ids or member_id in added_members:
             continue
 
         # Check if user exists
-        user = User.query.get(member_id)
-        if not user:
+        if member_id not in users_by_id:
             continue
 
         # Add member
@@ -418,26 +530,18 @@ def add_members(group_id: int):
 
     db.session.commit()
 
-    # Notify new members about the group
+    # Notify new members about the group, including each member's encrypted group key
     group_data = group.to_dict(include_members=True)
-    for member_id in added_members:
-        # Include the member's encrypted group key in the notification
-        member_data = {
-            **group_data,
-            "encryptedGroupKey": encrypted_keys.get(str(member_id)),
-        }
-        emit_group_created(member_id, member_data)
+    emit_group_created_for_members(added_members, group_data, encrypted_keys)
 
     # Notify existing members about new additions
-    for existing_member in group.members:
-        if existing_member.userID not in added_members and existing_member.userID != current_user_id:
-            for new_member_id in added_members:
-                new_user = User.query.get(new_member_id)
-                if new_user:
-                    emit_group_member_added(existing_member.userID, {
-                        "groupChatID": group_id,
-                        "member": new_user.to_dict(),
-                    })
+    new_member_dicts = [users_by_id[member_id].to_dict() for member_id in added_members]
+    notify_ids = [existing_id for existing_id in existing_ids if existing_id != current_user_id]
+    for new_member_dict in new_member_dicts:
+        emit_group_member_added_bulk(notify_ids, {
+            "groupChatID": group_id,
+            "member": new_member_dict,
+        })
 
     return jsonify({
         "message": f"Added {len(added_members)} member(s).",
@@ -457,16 +561,16 @@ def remove_member(group_id: int, member_id: int):
     """
     current_user_id = _current_user_id()
 
-    group = GroupChat.query.get(group_id)
+    group, role = _load_group_for_user(group_id, current_user_id)
     if not group:
         return jsonify({"message": "Group not found."}), 404
 
-    if not _is_group_member(group_id, current_user_id):
+    if role is None:
         return jsonify({"message": "You are not a member of this group."}), 403
 
     # Check permissions
     is_self = member_id == current_user_id
-    is_owner_user = _is_owner(group_id, current_user_id)
+    is_owner_user = role == "Owner"
 
     if not is_self and not is_owner_user:
         return jsonify({"message": "Only the owner can remove other members."}), 403
@@ -528,12 +632,10 @@ def remove_member(group_id: int, member_id: int):
     db.session.commit()
 
     # Notify remaining members
-    for remaining in group.members:
-        if remaining.userID != current_user_id:
-            emit_group_member_removed(remaining.userID, {
-                "groupChatID": group_id,
-                "removedUserId": member_id,
-            })
+    emit_group_member_removed_bulk(
+        [remaining.userID for remaining in group.members if remaining.userID != current_user_id],
+        {"groupChatID": group_id, "removedUserId": member_id},
+    )
 
     # Notify the removed member
     if not is_self:
@@ -556,11 +658,11 @@ def update_member_role(group_id: int, member_id: int):
     """
     current_user_id = _current_user_id()
 
-    group = GroupChat.query.get(group_id)
+    group, role = _load_group_for_user(group_id, current_user_id)
     if not group:
         return jsonify({"message": "Group not found."}), 404
 
-    if not _is_owner(group_id, current_user_id):
+    if role != "Owner":
         return jsonify({"message": "Only the owner can transfer ownership."}), 403
 
     if member_id == current_user_id:
@@ -613,11 +715,11 @@ def store_group_keys(group_id: int):
     """
     current_user_id = _current_user_id()
 
-    group = GroupChat.query.get(group_id)
+    group, role = _load_group_for_user(group_id, current_user_id)
     if not group:
         return jsonify({"message": "Group not found."}), 404
 
-    if not _is_group_member(group_id, current_user_id):
+    if role is None:
         return jsonify({"message": "You are not a member of this group."}), 403
 
     payload = request.get_json(silent=True) or {}
@@ -627,20 +729,7 @@ def store_group_keys(group_id: int):
         return jsonify({"message": "encryptedKeys must be an object."}), 400
 
     # Update keys for each member
-    for user_id_str, encrypted_key in encrypted_keys.items():
-        try:
-            user_id = int(user_id_str)
-        except ValueError:
-            continue
-
-        membership = GroupMember.query.filter_by(
-            groupChatID=group_id,
-            userID=user_id
-        ).first()
-
-        if membership:
-            membership.encrypted_group_key = encrypted_key
-
+    _store_encrypted_group_keys(group_id, encrypted_keys)
     db.session.commit()
 
     return jsonify({"message": "Group keys stored successfully."}), 200
@@ -660,9 +749,6 @@ def get_group_key(group_id: int):
     if not membership:
         return jsonify({"message": "You are not a member of this group."}), 403
 
-    # Debug logging
-    print(f"[DEBUG] get_group_key: group_id={group_id}, user_id={current_user_id}, has_key={membership.encrypted_group_key is not None}")
-
     return jsonify({
         "encryptedGroupKey": membership.encrypted_group_key,
     }), 200
@@ -679,11 +765,11 @@ def rotate_group_key(group_id: int):
     """
     current_user_id = _current_user_id()
 
-    group = GroupChat.query.get(group_id)
+    group, role = _load_group_for_user(group_id, current_user_id)
     if not group:
         return jsonify({"message": "Group not found."}), 404
 
-    if not _is_group_member(group_id, current_user_id):
+    if role is None:
         return jsonify({"message": "You are not a member of this group."}), 403
 
     payload = request.get_json(silent=True) or {}
@@ -693,20 +779,7 @@ def rotate_group_key(group_id: int):
         return jsonify({"message": "encryptedKeys must be an object."}), 400
 
     # Update keys for each member
-    for user_id_str, encrypted_key in encrypted_keys.items():
-        try:
-            user_id = int(user_id_str)
-        except ValueError:
-            continue
-
-        membership = GroupMember.query.filter_by(
-            groupChatID=group_id,
-            userID=user_id
-        ).first()
-
-        if membership:
-            membership.encrypted_group_key = encrypted_key
-
+    _store_encrypted_group_keys(group_id, encrypted_keys)
     db.session.commit()
 
     # Notify all members about the key rotation
@@ -730,42 +803,62 @@ def get_group_messages(group_id: int):
     """Get messages in a group."""
     current_user_id = _current_user_id()
 
-    group = GroupChat.query.get(group_id)
+    group, role = _load_group_for_user(group_id, current_user_id)
     if not group:
         return jsonify({"message": "Group not found."}), 404
 
-    if not _is_group_member(group_id, current_user_id):
+    if role is None:
         return jsonify({"message": "You are not a member of this group."}), 403
 
     # Get non-expired messages
     cutoff = datetime.utcnow()
-    messages = Message.query.filter(
+    # Eager-load what to_dict() touches and skip columns it never reads
+    messages = Message.query.options(
+        joinedload(Message.sender),
+        selectinload(Message.reply_to).joinedload(Message.sender),
+        defer(Message.deleted_for_sender),
+        defer(Message.deleted_for_receiver),
+        defer(Message.timer_reset_at),
+    ).filter(
         Message.groupChatID == group_id,
         Message.expiryTime > cutoff,
     ).order_by(Message.timeStamp.asc()).all()
 
+    # Load every member status for these messages in one query
+    deleted_msg_ids = set()
+    saved_msg_ids = set()
+    read_by_map: dict[int, list[int]] = {}
+    message_ids = [msg.msgID for msg in messages]
+    if message_ids:
+        status_rows = db.session.query(
+            GroupMessageStatus.msgID,
+            GroupMessageStatus.userID,
+            GroupMessageStatus.read_at,
+            GroupMessageStatus.saved_by_user,
+            GroupMessageStatus.deleted_for_user,
+        ).filter(GroupMessageStatus.msgID.in_(message_ids)).all()
+        for msg_id, user_id, read_at, saved_by_user, deleted_for_user in status_rows:
+            if user_id == current_user_id and deleted_for_user:
+                deleted_msg_ids.add(msg_id)
+            if saved_by_user:
+                saved_msg_ids.add(msg_id)
+            if read_at is not None:
+                read_by_map.setdefault(msg_id, []).append(user_id)
+
+    total_members = len(group.members)
+
     # Filter out messages deleted for this user
     result = []
     for msg in messages:
-        status = GroupMessageStatus.query.filter_by(
-            msgID=msg.msgID,
-            userID=current_user_id
-        ).first()
-
-        if status and status.deleted_for_user:
+        if msg.msgID in deleted_msg_ids:
             continue
 
         msg_dict = msg.to_dict(current_user_id)
 
         # Add group-specific read status
-        read_statuses = GroupMessageStatus.query.filter(
-            GroupMessageStatus.msgID == msg.msgID,
-            GroupMessageStatus.read_at.isnot(None)
-        ).all()
         # Exclude sender from readBy count
-        read_by_ids = [s.userID for s in read_statuses if s.userID != msg.senderID]
+        read_by_ids = [uid for uid in read_by_map.get(msg.msgID, []) if uid != msg.senderID]
         read_count = len(read_by_ids)
-        total_members = len(group.members)
 
         # Add readBy array for frontend
         msg_dict["readBy"] = read_by_ids
@@ -783,11 +876,7 @@ def get_group_messages(group_id: int):
                 msg_dict["groupReadStatusColor"] = "gray"
 
         # Symmetric saving: if ANY member saved, it's saved for all
-        any_saved = GroupMessageStatus.query.filter(
-            GroupMessageStatus.msgID == msg.msgID,
-            GroupMessageStatus.saved_by_user == True
-        ).first() is not None
-        msg_dict["saved"] = any_saved
+        msg_dict["saved"] = msg.msgID in saved_msg_ids
 
         result.append(msg_dict)
 
@@ -814,11 +903,11 @@ def send_group_message(group_id: int):
     if not allowed:
         return jsonify(error_response), 429
 
-    group = GroupChat.query.get(group_id)
+    group, role = _load_group_for_user(group_id, current_user_id)
     if not group:
         return jsonify({"message": "Group not found."}), 404
 
-    if not _is_group_member(group_id, current_user_id):
+    if role is None:
         return jsonify({"message": "You are not a member of this group."}), 403
 
     payload = request.get_json(silent=True) or {}
@@ -847,28 +936,23 @@ def send_group_message(group_id: int):
         expiryTime=Message.default_expiry_time(is_group=True),
         reply_to_id=payload.get("replyToId"),
     )
-    db.session.add(message)
-    db.session.flush()
-
-    # Mark as read by sender
-    sender_status = GroupMessageStatus(
-        msgID=message.msgID,
+    # Mark as read by sender; the relationship fills in msgID on commit,
+    # so no separate flush is needed to learn the new message ID
+    message.group_statuses.append(GroupMessageStatus(
         userID=current_user_id,
         read_at=datetime.utcnow(),
-    )
-    db.session.add(sender_status)
+    ))
+    db.session.add(message)
 
     db.session.commit()
 
     # Emit to all other members (pass None so isOwn=False for recipients)
     message_data_for_others = message.to_dict(None)
     message_data_for_others["readBy"] = []  # No one has read yet
-    for member in group.members:
-        if member.userID != current_user_id:
-            emit_group_message(member.userID, {
-                "groupChatID": group_id,
-                "message": message_data_for_others,
-            })
+    emit_group_message_bulk([mid for mid in _get_group_member_ids(group_id) if mid != current_user_id], {
+        "groupChatID": group_id,
+        "message": message_data_for_others,
+    })
 
     # Return sender's version with isOwn=True, including rate limit warning if present
     message_data_for_sender = message.to_dict(current_user_id)
@@ -896,22 +980,8 @@ def mark_message_read(group_id: int, message_id: int):
     if not message or message.groupChatID != group_id:
         return jsonify({"message": "Message not found."}), 404
 
-    # Get or create status
-    status = GroupMessageStatus.query.filter_by(
-        msgID=message_id,
-        userID=current_user_id
-    ).first()
-
-    if not status:
-        status = GroupMessageStatus(
-            msgID=message_id,
-            userID=current_user_id,
-        )
-        db.session.add(status)
-
-    if not status.read_at:
-        status.read_at = datetime.utcnow()
-
+    # Create or update status, only stamping read_at the first time
+    if _upsert_group_status(message_id, current_user_id, only_if_unread=True, read_at=datetime.utcnow()):
         # Check if all members have read (excluding sender)
         group = GroupChat.query.get(group_id)
         total_other_members = len(group.members) - 1  # Exclude sender
@@ -925,11 +995,7 @@ def mark_message_read(group_id: int, message_id: int):
         # Update message expiry if all have read
         if all_read:
             # Get max retention hours from all members
-            max_hours = DEFAULT_RETENTION_HOURS
-            for member in group.members:
-                user = member.user
-                hours = _get_user_retention_hours(user)
-                max_hours = max(max_hours, hours)
+            max_hours = _get_group_max_retention_hours(group_id)
             message.expiryTime = datetime.utcnow() + timedelta(hours=max_hours)
             message.status = "Read"
         elif read_count == 1:
@@ -996,17 +1062,14 @@ def edit_group_message(group_id: int, message_id: int):
     db.session.commit()
 
     # Notify all members
-    group = GroupChat.query.get(group_id)
-    for member in group.members:
-        if member.userID != current_user_id:
-            emit_group_message_edited(member.userID, {
-                "groupChatID": group_id,
-                "messageId": message_id,
-                "encryptedContent": encrypted_content,
-                "iv": iv,
-                "hmac": hmac_tag,
-                "editedAt": message.edited_at.isoformat(),
-            })
+    emit_group_message_edited_bulk([mid for mid in _get_group_member_ids(group_id) if mid != current_user_id], {
+        "groupChatID": group_id,
+        "messageId": message_id,
+        "encryptedContent": encrypted_content,
+        "iv": iv,
+        "hmac": hmac_tag,
+        "editedAt": message.edited_at.isoformat(),
+    })
 
     return jsonify({
         "message": "Message edited successfully.",
@@ -1044,38 +1107,16 @@ def unsend_group_message(group_id: int, message_id: int):
     db.session.commit()
 
     # Notify all members
-    group = GroupChat.query.get(group_id)
     sender = User.query.get(current_user_id)
-    for member in group.members:
-        if member.userID != current_user_id:
-            emit_group_message_unsent(member.userID, {
-                "groupChatID": group_id,
-                "messageId": message_id,
-                "senderUsername": sender.username if sender else "Unknown",
-                "unsentAt": message.unsent_at.isoformat(),
-            })
+    emit_group_message_unsent_bulk([mid for mid in _get_group_member_ids(group_id) if mid != current_user_id], {
+        "groupChatID": group_id,
+        "messageId": message_id,
+        "senderUsername": sender.username if sender else "Unknown",
+        "unsentAt": message.unsent_at.isoformat(),
+    })
 
     # Find the new last message for preview (not unsent, not deleted for user)
-    messages = (
-        Message.query.filter(
-            Message.groupChatID == group_id,
-            Message.expiryTime > datetime.utcnow(),
-            Message.is_unsent == False,
-        )
-        .order_by(Message.timeStamp.desc())
-        .limit(20)
-        .all()
-    )
-
-    new_last_message = None
-    for msg in messages:
-        msg_status = GroupMessageStatus.query.filter_by(
-            msgID=msg.msgID,
-            userID=current_user_id
-        ).first()
-        if not msg_status or not msg_status.deleted_for_user:
-            new_last_message = msg
-            break
+    new_last_message = _get_last_visible_message(group_id, current_user_id)
 
     return jsonify({
         "message": "Message unsent successfully.",
@@ -1097,43 +1138,12 @@ def delete_group_message(group_id: int, message_id: int):
     if not message or message.groupChatID != group_id:
         return jsonify({"message": "Message not found."}), 404
 
-    # Get or create status
-    status = GroupMessageStatus.query.filter_by(
-        msgID=message_id,
-        userID=current_user_id
-    ).first()
-
-    if not status:
-        status = GroupMessageStatus(
-            msgID=message_id,
-            userID=current_user_id,
-        )
-        db.session.add(status)
-
-    status.deleted_for_user = True
+    # Create or update status
+    _upsert_group_status(message_id, current_user_id, deleted_for_user=True)
     db.session.commit()
 
     # Find the new last message for this group (for preview update)
-    messages = (
-        Message.query.filter(
-            Message.groupChatID == group_id,
-            Message.expiryTime > datetime.utcnow(),
-            Message.is_unsent == False,
-        )
-        .order_by(Message.timeStamp.desc())
-        .limit(20)
-        .all()
-    )
-
-    new_last_message = None
-    for msg in messages:
-        msg_status = GroupMessageStatus.query.filter_by(
-            msgID=msg.msgID,
-            userID=current_user_id
-        ).first()
-        if not msg_status or not msg_status.deleted_for_user:
-            new_last_message = msg
-            break
+    new_last_message = _get_last_visible_message(group_id, current_user_id)
 
     return jsonify({
         "message": "Message deleted.",
@@ -1165,44 +1175,28 @@ def save_group_message(group_id: int, message_id: int):
     payload = request.get_json(silent=True) or {}
     saved = payload.get("saved", False)
 
-    # Get or create status
-    status = GroupMessageStatus.query.filter_by(
-        msgID=message_id,
-        userID=current_user_id
-    ).first()
-
-    if not status:
-        status = GroupMessageStatus(
-            msgID=message_id,
-            userID=current_user_id,
-        )
-        db.session.add(status)
-
-    status.saved_by_user = bool(saved)
-
+    # Create or update status
     # When unsaving, set timer_reset_at to restart the deletion timer from now
     # When saving, clear timer_reset_at so it doesn't interfere
-    if not saved:
-        status.timer_reset_at = datetime.utcnow()
-    else:
-        status.timer_reset_at = None
-
+    _upsert_group_status(
+        message_id,
+        current_user_id,
+        saved_by_user=bool(saved),
+        timer_reset_at=None if saved else datetime.utcnow(),
+    )
     db.session.commit()
 
     # Notify all group members about the save status change
-    group = GroupChat.query.get(group_id)
-    if group:
-        for member in group.members:
-            emit_group_message_saved(member.userID, {
-                "groupChatID": group_id,
-                "messageId": message_id,
-                "saved": bool(saved),
-                "savedBy": current_user_id,
-            })
+    emit_group_message_saved_bulk(_get_group_member_ids(group_id), {
+        "groupChatID": group_id,
+        "messageId": message_id,
+        "saved": bool(saved),
+        "savedBy": current_user_id,
+    })
 
     return jsonify({
         "message": "Message save status updated.",
-        "saved": status.saved_by_user,
+        "saved": bool(saved),
     }), 200
 
 
@@ -5,18 +5,52 @@ Handles public key storage, retrieval, and verification for E2EE.
 
 from __future__ import annotations
 
-from flask import Blueprint, jsonify, request
+import orjson
+from flask import Blueprint, Response, g, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import defer
 
 from ..database import db
 from ..models import PublicKey, User
 
 keys_bp = Blueprint("keys", __name__)
 
+# Key fields accepted by register/rotate, with their defaults
+_KEY_FIELDS = (
+    ("publicKey", ""),
+    ("algorithm", "ECC-SECP256R1"),
+    ("encryptedPrivateKey", ""),
+    ("salt", ""),
+    ("iv", ""),
+)
+
+# Dialect-specific INSERT constructs that support ON CONFLICT
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
 
 def _safe_identity() -> int:
-    """Load the current user id from the JWT."""
-    return int(get_jwt_identity())
+    """Load the current user id from the JWT (cached for the request)."""
+    user_id = getattr(g, "_current_user_id", None)
+    if user_id is None:
+        identity = get_jwt_identity()
+        user_id = identity if isinstance(identity, int) else int(identity)
+        g._current_user_id = user_id
+    return user_id
+
+
+def _extract_key_fields(payload: dict) -> tuple[str, str, str, str, str]:
+    """Return stripped (publicKey, algorithm, encryptedPrivateKey, salt, iv) from a request body."""
+    get = payload.get
+    return tuple(str(get(field, default) or "").strip() for field, default in _KEY_FIELDS)
+
+
+def _json_response(body: str) -> Response:
+    """Wrap an already-serialized JSON body without re-encoding it."""
+    return Response(body, status=200, mimetype="application/json")
 
 
 @keys_bp.post("/register")
@@ -43,31 +77,44 @@ def register_public_key():
     current_user_id = _safe_identity()
     payload = request.get_json(silent=True) or {}
 
-    public_key_str = payload.get("publicKey", "").strip()
-    algorithm = payload.get("algorithm", "ECC-SECP256R1").strip()
-    encrypted_private_key = payload.get("encryptedPrivateKey", "").strip()
-    salt = payload.get("salt", "").strip()
-    iv = payload.get("iv", "").strip()
+    public_key_str, algorithm, encrypted_private_key, salt, iv = _extract_key_fields(payload)
 
     if not public_key_str:
         return jsonify({"message": "Public key is required."}), 400
 
-    # Check if user already has a public key
-    existing_key = PublicKey.query.filter_by(userID=current_user_id).first()
-    if existing_key:
-        return jsonify({"message": "Public key already registered. Use key rotation endpoint to update."}), 409
+    values = {
+        "userID": current_user_id,
+        "publicKey": public_key_str,
+        "algorithm": algorithm,
+        "encrypted_private_key": encrypted_private_key if encrypted_private_key else None,
+        "private_key_salt": salt if salt else None,
+        "private_key_iv": iv if iv else None,
+    }
 
-    # Store the public key and encrypted private key backup
-    new_key = PublicKey(
-        userID=current_user_id,
-        publicKey=public_key_str,
-        algorithm=algorithm,
-        encrypted_private_key=encrypted_private_key if encrypted_private_key else None,
-        private_key_salt=salt if salt else None,
-        private_key_iv=iv if iv else None
-    )
+    insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if insert is None:
+        # No ON CONFLICT support: check for an existing key first
+        if db.session.query(PublicKey.keyID).filter_by(userID=current_user_id).scalar() is not None:
+            new_key = None
+        else:
+            new_key = PublicKey(**values)
+            db.session.add(new_key)
+    else:
+        # Insert only if the user has no key yet (unique userID), in one statement
+        stmt = (
+            insert(PublicKey)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=["userID"])
+            .returning(PublicKey)
+        )
+        new_key = db.session.scalars(stmt).first()
+
+    if new_key is None:
+        db.session.rollback()
+        return jsonify({"message": "Public key already registered. Use key rotation endpoint to update."}), 409
 
-    db.session.add(new_key)
+    db.session.flush()  # assign keyID/created_at before serializing
+    new_key.refresh_json()
     db.session.commit()
 
     return jsonify({
@@ -89,17 +136,22 @@ def get_encrypted_private_key():
     """
     current_user_id = _safe_identity()
 
-    public_key = PublicKey.query.filter_by(userID=current_user_id).first()
-    if not public_key:
+    row = (
+        db.session.query(PublicKey.encrypted_private_key, PublicKey.private_key_salt, PublicKey.private_key_iv)
+        .filter_by(userID=current_user_id)
+        .first()
+    )
+    if not row:
         return jsonify({"message": "No public key found for this user."}), 404
 
-    if not public_key.encrypted_private_key:
+    encrypted_private_key, salt, iv = row
+    if not encrypted_private_key:
         return jsonify({"message": "No encrypted private key backup found."}), 404
 
     return jsonify({
-        "encryptedPrivateKey": public_key.encrypted_private_key,
-        "salt": public_key.private_key_salt,
-        "iv": public_key.private_key_iv
+        "encryptedPrivateKey": encrypted_private_key,
+        "salt": salt,
+        "iv": iv
     }), 200
 
 
@@ -117,25 +169,23 @@ def get_public_key(user_id: int):
         200: Public key data
         404: User or key not found
     """
-    current_user_id = _safe_identity()
-
-    # Verify the target user exists
-    target_user = User.query.get(user_id)
-    if not target_user:
+    # Load the target user and their public key in one query
+    row = (
+        db.session.query(User, PublicKey)
+        .outerjoin(PublicKey, PublicKey.userID == User.userID)
+        .filter(User.userID == user_id)
+        .first()
+    )
+    if not row:
         return jsonify({"message": "User not found."}), 404
 
-    # Get the user's public key
-    public_key = PublicKey.query.filter_by(userID=user_id).first()
+    target_user, public_key = row
     if not public_key:
         return jsonify({"message": "Public key not found for this user."}), 404
 
-    return jsonify({
-        "user": {
-            "id": target_user.userID,
-            "username": target_user.username
-        },
-        "key": public_key.to_dict()
-    }), 200
+    user_json = orjson.dumps({"id": target_user.userID, "username": target_user.username}).decode()
+    key_json = public_key.to_json()
+    return _json_response(f'{{"user":{user_json},"key":{key_json}}}')
 
 
 @keys_bp.get("/my-key")
@@ -150,11 +200,15 @@ def get_my_public_key():
     """
     current_user_id = _safe_identity()
 
-    public_key = PublicKey.query.filter_by(userID=current_user_id).first()
+    public_key = (
+        PublicKey.query.options(defer(PublicKey.encrypted_private_key))
+        .filter_by(userID=current_user_id)
+        .first()
+    )
     if not public_key:
         return jsonify({"message": "You have not registered a public key yet."}), 404
 
-    return jsonify({"key": public_key.to_dict()}), 200
+    return _json_response(f'{{"key":{public_key.to_json()}}}')
 
 
 @keys_bp.delete("/my-key")
@@ -203,11 +257,7 @@ def rotate_public_key():
     current_user_id = _safe_identity()
     payload = request.get_json(silent=True) or {}
 
-    new_public_key_str = payload.get("publicKey", "").strip()
-    algorithm = payload.get("algorithm", "ECC-SECP256R1").strip()
-    encrypted_private_key = payload.get("encryptedPrivateKey", "").strip()
-    salt = payload.get("salt", "").strip()
-    iv = payload.get("iv", "").strip()
+    new_public_key_str, algorithm, encrypted_private_key, salt, iv = _extract_key_fields(payload)
 
     if not new_public_key_str:
         return jsonify({"message": "New public key is required."}), 400
@@ -227,6 +277,7 @@ def rotate_public_key():
         existing_key.private_key_salt = salt if salt else None
         existing_key.private_key_iv = iv if iv else None
 
+    existing_key.refresh_json()
     db.session.commit()
 
     return jsonify({
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 import base64
+import hmac
+import secrets
+from collections.abc import Mapping
 from datetime import datetime
+from types import MappingProxyType
 
-from flask import Blueprint, jsonify, request
+import orjson
+from flask import Blueprint, Response, jsonify, request, url_for
 from flask_jwt_extended import get_jwt_identity, jwt_required
 
 from ..database import db
@@ -15,20 +20,26 @@ DEFAULT_SETTINGS = {
     "messageRetentionHours": 72,
     "theme": "dark",
 }
+# Shared read-only view returned for users without custom settings
+_DEFAULTS_VIEW = MappingProxyType(DEFAULT_SETTINGS)
+# Response body for users without custom settings, serialized once at import
+_DEFAULT_SETTINGS_BYTES = orjson.dumps({"settings": DEFAULT_SETTINGS})
+
+_ALLOWED_THEMES = frozenset({"light", "dark"})
+_ALLOWED_MIME = frozenset({"image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"})
 
 
 def _current_user() -> User | None:
     user_id = get_jwt_identity()
     if not user_id:
         return None
-    return User.query.get(int(user_id))
+    return db.session.get(User, int(user_id))
 
 
-def _with_defaults(settings: dict | None) -> dict:
-    data = dict(DEFAULT_SETTINGS)
-    if isinstance(settings, dict):
-        data.update(settings)
-    return data
+def _with_defaults(settings: dict | None) -> Mapping[str, object]:
+    if not settings or not isinstance(settings, dict):
+        return _DEFAULTS_VIEW
+    return {**DEFAULT_SETTINGS, **settings}
 
 
 def _validate_settings(payload: dict) -> tuple[dict, list[str]]:
@@ -50,7 +61,7 @@ def _validate_settings(payload: dict) -> tuple[dict, list[str]]:
 
     if "theme" in payload:
         theme = (payload.get("theme") or "").lower()
-        if theme not in {"light", "dark"}:
+        if theme not in _ALLOWED_THEMES:
             errors.append("theme must be 'light' or 'dark'.")
         else:
             updates["theme"] = theme
@@ -65,6 +76,9 @@ def get_settings():
     if not user:
         return jsonify({"message": "User not found."}), 404
 
+    if not user.settings:
+        return Response(_DEFAULT_SETTINGS_BYTES, status=200, mimetype="application/json")
+
     return jsonify({"settings": _with_defaults(user.settings)}), 200
 
 
@@ -82,9 +96,9 @@ def update_settings():
     if not updates:
         return jsonify({"settings": _with_defaults(user.settings)}), 200
 
-    user_settings = user.settings.copy() if isinstance(user.settings, dict) else {}
-    user_settings.update(updates)
-    user.settings = user_settings
+    # Reassign a new dict so the plain JSON column is flagged dirty
+    current = user.settings if isinstance(user.settings, dict) else {}
+    user.settings = {**current, **updates}
     user.settings_updated_at = datetime.utcnow()  # Track when settings were changed
     db.session.commit()
 
@@ -99,7 +113,13 @@ def upload_profile_picture():
     if not user:
         return jsonify({"message": "User not found."}), 404
 
-    payload = request.get_json(silent=True) or {}
+    # Parse the (large) body directly with orjson and don't keep the raw bytes cached
+    try:
+        payload = orjson.loads(request.get_data(cache=False) or b"{}")
+    except orjson.JSONDecodeError:
+        payload = {}
+    if not isinstance(payload, dict):
+        payload = {}
     image_data = payload.get("imageData")
 
     if not image_data:
@@ -109,29 +129,41 @@ def upload_profile_picture():
     if not image_data.startswith("data:image/"):
         return jsonify({"message": "Invalid image format. Must be a data URL."}), 400
 
+    # Locate the header by index instead of splitting the (large) string
+    header_end = image_data.find(",", 0, 64)
+    if header_end == -1:
+        return jsonify({"message": "Invalid image format. Must be a data URL."}), 400
+
     # Extract mime type and validate
     try:
-        header, encoded = image_data.split(",", 1)
-        mime_type = header.split(":")[1].split(";")[0]
+        mime_end = image_data.find(";", 11, header_end)
+        mime_type = image_data[5:mime_end if mime_end != -1 else header_end]
+        encoded = image_data[header_end + 1:]
 
         # Supported formats
-        allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"]
-        if mime_type not in allowed_types:
-            return jsonify({"message": f"Unsupported image type. Allowed: {', '.join(allowed_types)}"}), 400
+        if mime_type not in _ALLOWED_MIME:
+            return jsonify({"message": f"Unsupported image type. Allowed: {', '.join(sorted(_ALLOWED_MIME))}"}), 400
 
-        # Decode to check validity and size
-        decoded = base64.b64decode(encoded)
-        size_kb = len(decoded) / 1024
+        # Estimate decoded size from the base64 length (4 chars -> 3 bytes, minus padding)
+        size_kb = (len(encoded) * 3 // 4 - encoded[-2:].count("=")) / 1024
 
         # Limit size to 500KB
         if size_kb > 500:
             return jsonify({"message": f"Image too large ({size_kb:.1f}KB). Maximum size is 500KB."}), 400
 
+        # Decode once; this also rejects malformed base64
+        decoded = base64.b64decode(encoded, validate=True)
+
     except Exception as e:
         return jsonify({"message": f"Invalid image data: {str(e)}"}), 400
 
-    # Save to database
-    user.prof_pic_url = image_data
+    # Save raw bytes to the database; clients load the image from an unguessable per-upload URL
+    user.prof_pic_mime = mime_type
+    user.prof_pic_blob = decoded
+    user.prof_pic_token = secrets.token_urlsafe(16)
+    user.prof_pic_url = url_for(
+        "settings.get_profile_picture", user_id=user.userID, token=user.prof_pic_token
+    )
     db.session.commit()
 
     return jsonify({
@@ -149,6 +181,9 @@ def delete_profile_picture():
         return jsonify({"message": "User not found."}), 404
 
     user.prof_pic_url = None
+    user.prof_pic_mime = None
+    user.prof_pic_blob = None
+    user.prof_pic_token = None
     db.session.commit()
 
     return jsonify({
@@ -157,4 +192,28 @@ def delete_profile_picture():
     }), 200
 
 
+@settings_bp.get("/profile-picture/<int:user_id>/<token>")
+def get_profile_picture(user_id: int, token: str):
+    """
+    Serve a user's profile picture as raw image bytes.
+
+    Not JWT-protected because browsers load it through <img src>, which cannot
+    send the Authorization header. Instead the URL carries a random token issued
+    on upload and only handed out via authenticated responses; it changes with
+    every upload, so the image can be cached.
+    """
+    user = db.session.get(User, user_id, options=[db.undefer_group("profile_picture")])
+    if (
+        not user
+        or not user.prof_pic_blob
+        or not user.prof_pic_token
+        or not hmac.compare_digest(token.encode(), user.prof_pic_token.encode())
+    ):
+        return jsonify({"message": "Profile picture not found."}), 404
+
+    response = Response(user.prof_pic_blob, mimetype=user.prof_pic_mime or "application/octet-stream")
+    response.headers["Cache-Control"] = "private, max-age=86400"
+    return response
+
+
 __all__ = ["settings_bp"]
@@ -28,6 +28,8 @@ CREATE TABLE user (
     email VARCHAR(255) NOT NULL UNIQUE,
     password VARCHAR(255) NOT NULL,  -- stores hashed password
     prof_pic_url TEXT,
+    prof_pic_mime VARCHAR(32),
+    prof_pic_blob MEDIUMBLOB,
     settings JSON,
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -44,8 +46,9 @@ CREATE TABLE public_key (
     publicKey TEXT NOT NULL,
     algorithm VARCHAR(50) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    public_key_json TEXT,  -- serialized key payload, refreshed on register/rotate
     FOREIGN KEY (userID) REFERENCES user(userID) ON DELETE CASCADE ON UPDATE CASCADE,
-    INDEX idx_userID (userID)
+    UNIQUE INDEX idx_userID (userID)
 );
 
 -- ============================================================================
@@ -139,7 +142,8 @@ CREATE TABLE message (
     INDEX idx_receiver (receiverID),
     INDEX idx_group (groupChatID),
     INDEX idx_timestamp (timeStamp),
-    INDEX idx_expiry (expiryTime)
+    INDEX idx_expiry (expiryTime),
+    INDEX idx_group_timestamp (groupChatID, timeStamp DESC)
 );
 
 -- ============================================================================
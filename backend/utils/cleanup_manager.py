@@ -1,15 +1,200 @@
 """Message cleanup manager with sender-driven deletion logic."""
 from __future__ import annotations
 
+import logging
+import time
 from datetime import datetime, timedelta
-from sqlalchemy import or_
+from sqlalchemy import and_, case, delete, func, lambda_stmt, not_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 
 from ..database import db
-from ..models import Message, User, GroupChat, GroupMember, GroupMessageStatus
-from ..websocket_helper import emit_message_deleted, emit_group_message_deleted
+from ..models import Message, User, GroupChat, GroupMessageStatus
+from ..websocket_helper import emit_messages_deleted, emit_group_messages_deleted
 
+logger = logging.getLogger(__name__)
 
-def cleanup_expired_messages() -> dict:
+DEFAULT_RETENTION_HOURS = 24
+FALLBACK_RETENTION_HOURS = 24
+FALLBACK_RETENTION = timedelta(hours=FALLBACK_RETENTION_HOURS)
+_EPOCH = datetime(1970, 1, 1)
+# Max IDs per IN (...) list in bulk statements (stays under SQLite's parameter limit)
+BULK_BATCH_SIZE = 1000
+# Messages processed (and committed) per cleanup batch
+CLEANUP_BATCH_SIZE = 1000
+# Max rows removed per hard-delete statement
+HARD_DELETE_BATCH_SIZE = 10000
+
+
+def _chunked(ids: list[int], size: int = BULK_BATCH_SIZE):
+    """Yield successive slices of at most size IDs."""
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _queue_message_deleted(pending: dict[int, list[dict]], user_id: int, message_id: int, conversation_id: int) -> None:
+    """Queue a deletion notification; flushed as one batched event per user after commit."""
+    pending.setdefault(user_id, []).append({"messageId": message_id, "conversationId": conversation_id})
+
+
+def _flush_message_deleted(pending: dict[int, list[dict]]) -> None:
+    for user_id, deletions in pending.items():
+        emit_messages_deleted(user_id, deletions)
+
+
+def _apply_direct_message_deletions(
+    sender_delete_ids: list[int], receiver_delete_ids: list[int], hard_delete_ids: list[int]
+) -> None:
+    """Apply a batch's soft deletions and hard deletions with bulk statements."""
+    for batch in _chunked(sender_delete_ids):
+        db.session.execute(
+            update(Message).where(Message.msgID.in_(batch)).values(deleted_for_sender=True),
+            execution_options={"synchronize_session": False},
+        )
+    for batch in _chunked(receiver_delete_ids):
+        db.session.execute(
+            update(Message).where(Message.msgID.in_(batch)).values(deleted_for_receiver=True),
+            execution_options={"synchronize_session": False},
+        )
+    for batch in _chunked(hard_delete_ids):
+        db.session.execute(
+            delete(Message).where(Message.msgID.in_(batch)),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def _delete_fully_deleted_messages(batch_size: int = HARD_DELETE_BATCH_SIZE) -> int:
+    """
+    Hard delete 1-1 messages deleted for both sender and receiver, in bounded batches.
+
+    Each batch selects up to n IDs first and then deletes them by ID, so no single
+    statement holds locks on an unbounded number of rows. (MySQL rejects both a
+    LIMIT inside IN (...) and a subquery on the DELETE's own table.)
+    """
+    deleted = 0
+    while True:
+        batch_ids = [
+            msg_id
+            for (msg_id,) in db.session.query(Message.msgID)
+            .filter(
+                Message.groupChatID.is_(None),
+                Message.deleted_for_sender == True,
+                Message.deleted_for_receiver == True,
+            )
+            .limit(batch_size)
+        ]
+        for chunk in _chunked(batch_ids):
+            db.session.execute(
+                delete(Message).where(Message.msgID.in_(chunk)),
+                execution_options={"synchronize_session": False},
+            )
+        deleted += len(batch_ids)
+        if len(batch_ids) < batch_size:
+            return deleted
+
+
+_DEFAULT_RETENTION = timedelta(hours=DEFAULT_RETENTION_HOURS)
+
+
+def _retention_delta(user: User | None, cache: dict[int, timedelta]) -> timedelta:
+    """A user's retention setting as a timedelta, parsed once per cleanup run."""
+    if user is None:
+        return _DEFAULT_RETENTION
+    delta = cache.get(user.userID)
+    if delta is None:
+        hours = (user.settings or {}).get('messageRetentionHours', DEFAULT_RETENTION_HOURS)
+        delta = cache[user.userID] = timedelta(hours=hours)
+    return delta
+
+
+def _epoch_seconds(expr, dialect_name: str):
+    """SQL expression for a naive UTC datetime as seconds since the epoch, or None if unsupported."""
+    if dialect_name == "sqlite":
+        return (func.julianday(expr) - 2440587.5) * 86400.0
+    if dialect_name == "postgresql":
+        return func.extract("epoch", expr)
+    if dialect_name in ("mysql", "mariadb"):
+        return func.unix_timestamp(expr)
+    return None
+
+
+def _sender_retention_hours():
+    """SQL expression for the joined sender's retention setting in hours."""
+    return func.coalesce(User.settings["messageRetentionHours"].as_float(), DEFAULT_RETENTION_HOURS)
+
+
+def _greatest(dialect_name: str, *exprs):
+    # SQLite's multi-argument max() is its scalar GREATEST
+    return func.max(*exprs) if dialect_name == "sqlite" else func.greatest(*exprs)
+
+
+def _expired_direct_message_filter(now: datetime, dialect_name: str):
+    """
+    Conservative SQL pre-filter for 1-1 messages whose deletion time has passed.
+
+    Mirrors the rules in cleanup_expired_messages so only candidates are loaded;
+    the Python loop still applies the exact checks.
+    """
+    both_read = and_(Message.read_by_sender_at.isnot(None), Message.read_by_receiver_at.isnot(None))
+    fallback_expired = and_(
+        ~both_read,
+        Message.timeStamp <= now - FALLBACK_RETENTION,
+    )
+
+    start_epoch = _epoch_seconds(
+        case(
+            (Message.timer_reset_at.isnot(None), Message.timer_reset_at),
+            else_=_greatest(
+                dialect_name,
+                Message.read_by_sender_at,
+                Message.read_by_receiver_at,
+                func.coalesce(User.settings_updated_at, Message.read_by_sender_at),
+            ),
+        ),
+        dialect_name,
+    )
+    if start_epoch is None:
+        # Can't do date arithmetic portably here; let the loop check read messages
+        return or_(both_read, fallback_expired)
+
+    now_epoch = (now - _EPOCH).total_seconds()
+    retention_expired = and_(both_read, start_epoch + _sender_retention_hours() * 3600 <= now_epoch)
+    return or_(retention_expired, fallback_expired)
+
+
+def _due_group_message_filter(now: datetime, dialect_name: str):
+    """
+    Conservative SQL pre-filter for group messages that may be due for cleanup.
+
+    A group message can only expire once it is older than the shorter of its
+    sender's retention and the 24-hour fallback (every read time is after the
+    send time), unless no member still has it (ready for hard delete). Messages
+    saved by any member are skipped. Requires User to be joined as the sender.
+    """
+    undeleted_status = db.session.query(GroupMessageStatus.msgID).filter(
+        GroupMessageStatus.msgID == Message.msgID,
+        GroupMessageStatus.deleted_for_user == False,
+    ).exists()
+    saved_status = db.session.query(GroupMessageStatus.msgID).filter(
+        GroupMessageStatus.msgID == Message.msgID,
+        GroupMessageStatus.saved_by_user == True,
+    ).exists()
+
+    sent_epoch = _epoch_seconds(Message.timeStamp, dialect_name)
+    if sent_epoch is None:
+        return ~saved_status
+
+    retention_hours = _sender_retention_hours()
+    earliest_hours = case(
+        (retention_hours < FALLBACK_RETENTION_HOURS, retention_hours),
+        else_=FALLBACK_RETENTION_HOURS,
+    )
+    now_epoch = (now - _EPOCH).total_seconds()
+    old_enough = sent_epoch + earliest_hours * 3600 <= now_epoch
+    return and_(~saved_status, or_(old_enough, ~undeleted_status))
+
+
+def cleanup_expired_messages(max_runtime_seconds: float | None = None) -> dict:
     """
     Delete expired messages based on sender-driven deletion logic.
 
@@ -19,6 +204,11 @@ def cleanup_expired_messages() -> dict:
     3. Not read by both → Mark deleted for both at (sent_time + 24 hours)
     4. Actually delete message when deleted_for_sender AND deleted_for_receiver both true
 
+    Messages are processed and committed in batches of CLEANUP_BATCH_SIZE.
+
+    Args:
+        max_runtime_seconds: Stop after the batch that exceeds this budget; the next run continues
+
     Returns:
         dict: Statistics about deleted/soft-deleted messages
     """
@@ -31,117 +221,177 @@ def cleanup_expired_messages() -> dict:
     # Skip messages that are:
     # 1. Already deleted for both parties (nothing to do)
     # 2. Group messages (handled by cleanup_expired_group_messages)
-    # Note: We check per-user saved status later in the loop
-    messages_to_check = Message.query.filter(
-        Message.groupChatID.is_(None),  # Only 1-1 messages
-        or_(
-            Message.deleted_for_sender == False,
-            Message.deleted_for_receiver == False
-        )
-    ).all()
-
-    print(f"Smart query: Checking {len(messages_to_check)} messages (skipped fully-deleted messages)")
-
-    for message in messages_to_check:
-        modified = False
-
-        # Skip unsent messages - they are handled by cleanup_unsent_placeholders()
-        if message.is_unsent:
-            continue
-
-        # Get sender and receiver
-        sender = User.query.get(message.senderID)
-        receiver = User.query.get(message.receiverID)
-
-        if not sender or not receiver:
-            continue
-
-        # Shared saved flag: if either user saved, treat as saved for both
-        is_saved = bool(message.saved_by_sender or message.saved_by_receiver)
-
-        # Get sender's retention setting (in hours). Receiver's timer should not delete incoming messages.
-        sender_retention_hours = sender.settings.get('messageRetentionHours', 24) if sender.settings else 24
-
-        # Debug: Print retention settings
-        print(f"  Message {message.msgID}: Sender({sender.username}) retention={sender_retention_hours}h")
+    # 3. Unsent (handled by cleanup_unsent_placeholders) or saved by either user
+    # 4. Not yet past their retention / 24-hour fallback deadline
+    # Sender and receiver are loaded in the same query (no per-message lookups)
+    dialect_name = db.session.get_bind().dialect.name
+    candidates = Message.query.join(Message.sender).options(
+        contains_eager(Message.sender),
+        joinedload(Message.receiver),
+    ).filter(
+        # Only 1-1 messages not yet deleted for both users (matches ix_message_live_direct)
+        Message.groupChatID.is_(None),
+        not_(and_(Message.deleted_for_sender == True, Message.deleted_for_receiver == True)),
+        Message.is_unsent == False,
+        Message.saved_by_sender == False,
+        Message.saved_by_receiver == False,
+        _expired_direct_message_filter(now, dialect_name),
+    ).order_by(Message.msgID)
+
+    checked_count = 0
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    # IDs collected per batch and applied with bulk statements before its commit
+    sender_delete_ids: list[int] = []
+    receiver_delete_ids: list[int] = []
+    hard_delete_ids: list[int] = []
+    # Deletion notifications per user, sent once the batch is committed
+    pending_emits: dict[int, list[dict]] = {}
+    retention_by_user: dict[int, timedelta] = {}
+    fallback_cutoff = now - FALLBACK_RETENTION
+
+    started = time.monotonic()
+    last_msg_id = 0
+    while True:
+        # Keyset pagination: each batch is processed and committed in its own short transaction
+        messages_to_check = candidates.filter(Message.msgID > last_msg_id).limit(CLEANUP_BATCH_SIZE).all()
+        if not messages_to_check:
+            break
+        last_msg_id = messages_to_check[-1].msgID
+
+        for message in messages_to_check:
+            checked_count += 1
+            modified = False
+            deleted_for_sender = message.deleted_for_sender
+            deleted_for_receiver = message.deleted_for_receiver
+
+            # Skip unsent messages - they are handled by cleanup_unsent_placeholders()
+            if message.is_unsent:
+                continue
+
+            # Get sender and receiver
+            sender = message.sender
+            receiver = message.receiver
+
+            if not sender or not receiver:
+                continue
+
+            # Shared saved flag: if either user saved, treat as saved for both
+            is_saved = bool(message.saved_by_sender or message.saved_by_receiver)
+
+            # Get sender's retention setting. Receiver's timer should not delete incoming messages.
+            sender_retention = _retention_delta(sender, retention_by_user)
+
+            if debug:
+                logger.debug("  Message %s: Sender(%s) retention=%s", message.msgID, sender.username, sender_retention)
+                logger.debug(
+                    "    read_by_sender_at: %s, read_by_receiver_at: %s",
+                    message.read_by_sender_at, message.read_by_receiver_at,
+                )
 
-        # Check if both parties have read the message
-        print(f"    read_by_sender_at: {message.read_by_sender_at}, read_by_receiver_at: {message.read_by_receiver_at}")
-        if message.read_by_sender_at and message.read_by_receiver_at:
-            # Both read: Use sender retention from when both read
-            both_read_time = max(message.read_by_sender_at, message.read_by_receiver_at)
+            # Check if both parties have read the message
+            if message.read_by_sender_at and message.read_by_receiver_at:
+                # Both read: Use sender retention from when both read
+                both_read_time = max(message.read_by_sender_at, message.read_by_receiver_at)
 
-            # Use sender's retention to drive deletion for both sides
-            # If timer_reset_at is set (message was unsaved), use that as the start time
-            if message.timer_reset_at:
-                sender_start_time = message.timer_reset_at
-                print(f"    Timer was reset at {message.timer_reset_at}, using as start time")
-            else:
-                sender_start_time = both_read_time
-                if sender.settings_updated_at and sender.settings_updated_at > both_read_time:
-                    sender_start_time = sender.settings_updated_at
-                    print(f"    Sender changed settings at {sender.settings_updated_at}, using as start time")
-
-            sender_deletion_time = sender_start_time + timedelta(hours=sender_retention_hours)
-            time_until_sender_delete = (sender_deletion_time - now).total_seconds()
-            print(f"    Sender-driven deletion in {time_until_sender_delete:.1f}s (start time: {sender_start_time})")
-
-            if now >= sender_deletion_time:
-                if is_saved:
-                    print("    Message is saved - skipping deletion for both users")
+                # Use sender's retention to drive deletion for both sides
+                # If timer_reset_at is set (message was unsaved), use that as the start time
+                if message.timer_reset_at:
+                    sender_start_time = message.timer_reset_at
+                    logger.debug("    Timer was reset at %s, using as start time", message.timer_reset_at)
                 else:
-                    if not message.deleted_for_sender:
-                        print(f"    -> Deleting for SENDER {sender.username}")
-                        message.deleted_for_sender = True
-                        modified = True
-                        soft_deleted_count += 1
-                        emit_message_deleted(message.senderID, message.msgID, message.receiverID)
-
-                    if not message.deleted_for_receiver:
-                        print(f"    -> Deleting for RECEIVER {receiver.username} (sender retention hit)")
-                        message.deleted_for_receiver = True
-                        modified = True
-                        soft_deleted_count += 1
-                        emit_message_deleted(message.receiverID, message.msgID, message.senderID)
-        else:
-            # Not read by both: Apply 24-hour fallback for both users
-            fallback_deletion_time = message.timeStamp + timedelta(hours=24)
-            time_until_fallback = (fallback_deletion_time - now).total_seconds()
-            print(f"    -> Using 24-hour fallback (expires in {time_until_fallback:.1f}s)")
-
-            if now >= fallback_deletion_time:
-                if is_saved:
-                    print("    Message is saved - skipping fallback deletion for both users")
+                    sender_start_time = both_read_time
+                    if sender.settings_updated_at and sender.settings_updated_at > both_read_time:
+                        sender_start_time = sender.settings_updated_at
+                        logger.debug("    Sender changed settings at %s, using as start time", sender.settings_updated_at)
+
+                if debug:
+                    logger.debug(
+                        "    Sender-driven deletion in %.1fs (start time: %s)",
+                        (sender_start_time + sender_retention - now).total_seconds(), sender_start_time,
+                    )
+
+                if now - sender_start_time >= sender_retention:
+                    if is_saved:
+                        logger.debug("    Message is saved - skipping deletion for both users")
+                    else:
+                        if not deleted_for_sender:
+                            logger.debug("    -> Deleting for SENDER %s", sender.username)
+                            deleted_for_sender = True
+                            modified = True
+                            soft_deleted_count += 1
+                            _queue_message_deleted(pending_emits, message.senderID, message.msgID, message.receiverID)
+
+                        if not deleted_for_receiver:
+                            logger.debug("    -> Deleting for RECEIVER %s (sender retention hit)", receiver.username)
+                            deleted_for_receiver = True
+                            modified = True
+                            soft_deleted_count += 1
+                            _queue_message_deleted(pending_emits, message.receiverID, message.msgID, message.senderID)
+            else:
+                # Not read by both: Apply 24-hour fallback for both users
+                if debug:
+                    logger.debug(
+                        "    -> Using 24-hour fallback (expires in %.1fs)",
+                        (message.timeStamp - fallback_cutoff).total_seconds(),
+                    )
+
+                if message.timeStamp <= fallback_cutoff:
+                    if is_saved:
+                        logger.debug("    Message is saved - skipping fallback deletion for both users")
+                    else:
+                        if not deleted_for_sender:
+                            deleted_for_sender = True
+                            modified = True
+                            soft_deleted_count += 1
+                            _queue_message_deleted(pending_emits, message.senderID, message.msgID, message.receiverID)
+                        if not deleted_for_receiver:
+                            deleted_for_receiver = True
+                            modified = True
+                            soft_deleted_count += 1
+                            _queue_message_deleted(pending_emits, message.receiverID, message.msgID, message.senderID)
+
+            if modified:
+                if deleted_for_sender and deleted_for_receiver:
+                    # Deleted for both in this run: remove the row directly instead of
+                    # writing the flags first and deleting it in the sweep below
+                    hard_delete_ids.append(message.msgID)
+                elif deleted_for_sender:
+                    sender_delete_ids.append(message.msgID)
                 else:
-                    if not message.deleted_for_sender:
-                        message.deleted_for_sender = True
-                        modified = True
-                        soft_deleted_count += 1
-                        emit_message_deleted(message.senderID, message.msgID, message.receiverID)
-                    if not message.deleted_for_receiver:
-                        message.deleted_for_receiver = True
-                        modified = True
-                        soft_deleted_count += 1
-                        emit_message_deleted(message.receiverID, message.msgID, message.senderID)
-
-        # Actually delete if both users have marked it deleted
-        if message.deleted_for_sender and message.deleted_for_receiver:
-            db.session.delete(message)
-            hard_deleted_count += 1
-            modified = True
-
-        if modified:
-            messages_modified += 1
+                    receiver_delete_ids.append(message.msgID)
+                messages_modified += 1
 
-    if messages_modified > 0:
+        if sender_delete_ids or receiver_delete_ids or hard_delete_ids:
+            _apply_direct_message_deletions(sender_delete_ids, receiver_delete_ids, hard_delete_ids)
+            db.session.commit()
+            _flush_message_deleted(pending_emits)
+            hard_deleted_count += len(hard_delete_ids)
+            sender_delete_ids.clear()
+            receiver_delete_ids.clear()
+            hard_delete_ids.clear()
+            pending_emits.clear()
+
+        if len(messages_to_check) < CLEANUP_BATCH_SIZE:
+            break
+        if max_runtime_seconds is not None and time.monotonic() - started > max_runtime_seconds:
+            logger.info("Cleanup time budget of %ss reached; remaining messages are left for the next run", max_runtime_seconds)
+            break
+
+    logger.info("Smart query: Checked %d messages (skipped fully-deleted messages)", checked_count)
+
+    # Also remove messages left deleted for both users earlier (uses the partial index)
+    swept_count = _delete_fully_deleted_messages()
+    if swept_count:
         db.session.commit()
+        hard_deleted_count += swept_count
 
     return {
         "hard_deleted_count": hard_deleted_count,
         "soft_deleted_count": soft_deleted_count,
         "messages_modified": messages_modified,
         "timestamp": now.isoformat(),
-        "checked_count": len(messages_to_check),
+        "checked_count": checked_count,
     }
 
 
@@ -164,52 +414,59 @@ def cleanup_expired_group_messages() -> dict:
     messages_modified = 0
 
     # Get all group messages that haven't been fully deleted
-    group_messages = Message.query.filter(
+    # Groups, their members and senders are loaded up front with IN (...) queries
+    # Only messages that can be due are loaded (see _due_group_message_filter)
+    dialect_name = db.session.get_bind().dialect.name
+    group_messages = Message.query.join(Message.sender).options(
+        selectinload(Message.group).selectinload(GroupChat.members),
+        contains_eager(Message.sender),
+    ).filter(
         Message.groupChatID.isnot(None),
-        Message.is_unsent == False
+        Message.is_unsent == False,
+        _due_group_message_filter(now, dialect_name),
     ).all()
 
-    print(f"Checking {len(group_messages)} group messages for cleanup")
+    logger.info("Checking %d group messages for cleanup", len(group_messages))
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    # Deleted message IDs per (group, member), sent as one event each after commit
+    pending_group_emits: dict[tuple[int, int], list[int]] = {}
+    retention_by_user: dict[int, timedelta] = {}
+    fallback_cutoff = now - FALLBACK_RETENTION
+
+    # Load every existing status for these messages up front, keyed by (msgID, userID)
+    statuses_by_key: dict[tuple[int, int], GroupMessageStatus] = {}
+    for batch in _chunked([m.msgID for m in group_messages]):
+        for status in GroupMessageStatus.query.filter(GroupMessageStatus.msgID.in_(batch)):
+            statuses_by_key[(status.msgID, status.userID)] = status
 
     for message in group_messages:
         group = message.group
         if not group:
             continue
 
-        members = GroupMember.query.filter_by(groupChatID=group.groupChatID).all()
-        member_ids = [m.userID for m in members]
+        member_ids = [m.userID for m in group.members]
 
         if not member_ids:
             continue
 
-        # Get or create status for each member
+        # Get or create status for each member (missing rows are inserted in one flush at commit)
         statuses = {}
         for member_id in member_ids:
-            status = GroupMessageStatus.query.filter_by(
-                msgID=message.msgID,
-                userID=member_id
-            ).first()
+            status = statuses_by_key.get((message.msgID, member_id))
             if not status:
                 status = GroupMessageStatus(
                     msgID=message.msgID,
                     userID=member_id
                 )
                 db.session.add(status)
+                statuses_by_key[(message.msgID, member_id)] = status
             statuses[member_id] = status
 
-        # Flush immediately to avoid autoflush during next GroupMember query
-        # This prevents IntegrityError if status already exists
-        try:
-            db.session.flush()
-        except Exception as e:
-            print(f"  Warning: Failed to flush statuses for message {message.msgID}: {e}")
-            db.session.rollback()
-            continue
-
         # Check if any member has saved the message
         is_saved = any(s.saved_by_user for s in statuses.values())
         if is_saved:
-            print(f"  Group message {message.msgID}: Saved by a member - skipping deletion")
+            logger.debug("  Group message %s: Saved by a member - skipping deletion", message.msgID)
             continue
 
         # Check if all members already have it deleted
@@ -225,10 +482,8 @@ def cleanup_expired_group_messages() -> dict:
             continue
 
         # Get sender for retention settings (sender-driven deletion)
-        sender = User.query.get(message.senderID)
-        sender_retention_hours = 24  # Default
-        if sender and sender.settings:
-            sender_retention_hours = sender.settings.get('messageRetentionHours', 24)
+        sender = message.sender
+        sender_retention = _retention_delta(sender, retention_by_user)
 
         # Check if all members have read the message
         all_read = all(s.read_at is not None for s in statuses.values())
@@ -244,39 +499,48 @@ def cleanup_expired_group_messages() -> dict:
                     effective_read_times.append(status.read_at)
 
             latest_read = max(effective_read_times)
-            deletion_time = latest_read + timedelta(hours=sender_retention_hours)
-            print(f"  Group message {message.msgID}: All read, sender retention={sender_retention_hours}h, deletes at {deletion_time}")
+            if debug:
+                logger.debug(
+                    "  Group message %s: All read, sender retention=%s, deletes at %s",
+                    message.msgID, sender_retention, latest_read + sender_retention,
+                )
 
-            if now >= deletion_time:
+            if now - latest_read >= sender_retention:
                 # Soft delete for all members
                 for member_id, status in statuses.items():
                     if not status.deleted_for_user:
                         status.deleted_for_user = True
                         soft_deleted_count += 1
-                        emit_group_message_deleted(member_id, {
-                            "groupChatID": group.groupChatID,
-                            "messageId": message.msgID,
-                        })
+                        pending_group_emits.setdefault((group.groupChatID, member_id), []).append(message.msgID)
                 messages_modified += 1
         else:
             # Not all read: 24-hour fallback
-            fallback_time = message.timeStamp + timedelta(hours=24)
-            print(f"  Group message {message.msgID}: Not all read, fallback deletes at {fallback_time}")
+            if debug:
+                logger.debug(
+                    "  Group message %s: Not all read, fallback deletes at %s",
+                    message.msgID, message.timeStamp + FALLBACK_RETENTION,
+                )
 
-            if now >= fallback_time:
+            if message.timeStamp <= fallback_cutoff:
                 # Soft delete for all members
                 for member_id, status in statuses.items():
                     if not status.deleted_for_user:
                         status.deleted_for_user = True
                         soft_deleted_count += 1
-                        emit_group_message_deleted(member_id, {
-                            "groupChatID": group.groupChatID,
-                            "messageId": message.msgID,
-                        })
+                        pending_group_emits.setdefault((group.groupChatID, member_id), []).append(message.msgID)
                 messages_modified += 1
 
-    if messages_modified > 0:
+    try:
         db.session.commit()
+    except IntegrityError as e:
+        # A status row was created concurrently (e.g. a member read the message); retry next run
+        logger.warning("Failed to save group cleanup changes: %s", e)
+        db.session.rollback()
+        pending_group_emits.clear()
+        hard_deleted_count = soft_deleted_count = messages_modified = 0
+
+    for (group_id, member_id), message_ids in pending_group_emits.items():
+        emit_group_messages_deleted(member_id, group_id, message_ids)
 
     return {
         "hard_deleted_count": hard_deleted_count,
@@ -305,17 +569,19 @@ def cleanup_unsent_placeholders() -> dict:
     # Find all unsent messages that are more than 24 hours old
     expiry_threshold = now - timedelta(hours=24)
 
-    unsent_messages = Message.query.filter(
+    # lambda_stmt caches the constructed statement; expiry_threshold becomes a bound parameter
+    unsent_messages = db.session.scalars(lambda_stmt(lambda: select(Message).where(
         Message.is_unsent == True,
         Message.unsent_at != None,
         Message.unsent_at < expiry_threshold
-    ).all()
+    ))).all()
 
-    print(f"Found {len(unsent_messages)} unsent message placeholders older than 24 hours")
+    logger.info("Found %d unsent message placeholders older than 24 hours", len(unsent_messages))
 
+    pending_emits: dict[int, list[dict]] = {}
     for message in unsent_messages:
         # Notify the receiver that the unsent placeholder is being removed
-        emit_message_deleted(message.receiverID, message.msgID, message.senderID)
+        _queue_message_deleted(pending_emits, message.receiverID, message.msgID, message.senderID)
 
         # Delete the message
         db.session.delete(message)
@@ -323,6 +589,7 @@ def cleanup_unsent_placeholders() -> dict:
 
     if deleted_count > 0:
         db.session.commit()
+        _flush_message_deleted(pending_emits)
 
     return {
         "deleted_placeholder_count": deleted_count,
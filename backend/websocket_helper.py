@@ -3,24 +3,150 @@ Helper module to emit events to the relay server over HTTP.
 """
 from __future__ import annotations
 
+import logging
 import os
+import queue
+import socket
+import threading
+import time
+
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+logger = logging.getLogger(__name__)
 
 RELAY_SERVER_URL = os.environ.get("RELAY_API_URL", "http://localhost:5001")
 RELAY_API_TOKEN = os.environ.get("RELAY_API_TOKEN", "dev-relay-token")
 
+_HEADERS = {"X-Relay-Token": RELAY_API_TOKEN, "Content-Type": "application/json"}
+
+
+class _RelayAdapter(HTTPAdapter):
+    """Connection pool for the relay: no Nagle delay on small bodies, TCP keepalive on idle sockets."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+# One pooled session so emits reuse keep-alive connections to the relay
+_session = requests.Session()
+_adapter = _RelayAdapter(pool_connections=4, pool_maxsize=64, max_retries=0)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+# Full relay URLs, built once per path
+_urls: dict[str, str] = {}
+
+
+def _url(path: str) -> str:
+    url = _urls.get(path)
+    if url is None:
+        url = _urls[path] = f"{RELAY_SERVER_URL}{path}"
+    return url
+
+
+# Emits are queued and delivered by background workers so request threads never block on the relay
+RELAY_QUEUE_SIZE = 10000
+# A single worker keeps events in the order they were emitted (e.g. a message before its edit)
+RELAY_WORKER_COUNT = 1
+# Events arriving within RELAY_FLUSH_MS of each other are sent together as one /relay/batch POST
+RELAY_FLUSH_MS = 10
+RELAY_BATCH_SIZE = 256
+# After RELAY_BREAKER_FAILURES consecutive failed deliveries, events are dropped for RELAY_BREAKER_COOLDOWN_SECONDS
+RELAY_BREAKER_FAILURES = 5
+RELAY_BREAKER_COOLDOWN_SECONDS = 10
+
+_queue: queue.Queue[tuple[str, bytes]] = queue.Queue(maxsize=RELAY_QUEUE_SIZE)
+_workers_lock = threading.Lock()
+_workers_pid: int | None = None
+_fail_streak = 0
+_breaker_open_until = 0.0
+
+
+def _ensure_workers():
+    """Start the delivery workers once per process (threads don't survive a fork)."""
+    global _workers_pid
+    if _workers_pid == os.getpid():
+        return
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+        for index in range(RELAY_WORKER_COUNT):
+            threading.Thread(target=_worker, name=f"relay-emit-{index}", daemon=True).start()
+        _workers_pid = os.getpid()
+
+
+def _worker():
+    while True:
+        batch = [_queue.get()]
+        deadline = time.monotonic() + RELAY_FLUSH_MS / 1000
+        while len(batch) < RELAY_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            if len(batch) == 1:
+                _deliver(*batch[0])
+            else:
+                _deliver("/relay/batch", _batch_body(batch))
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def _batch_body(batch: list[tuple[str, bytes]]) -> bytes:
+    """Wrap queued (path, body) pairs in a /relay/batch envelope without re-encoding the bodies."""
+    events = b",".join(b'{"path":' + orjson.dumps(path) + b',"body":' + body + b"}" for path, body in batch)
+    return b'{"events":[' + events + b"]}"
+
 
 def _post(path: str, payload: dict):
+    _post_body(path, orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS))
+
+
+def _post_body(path: str, body: bytes):
+    """Queue an already-serialized JSON body for delivery to the relay server."""
+    if time.monotonic() < _breaker_open_until:
+        return
+    _ensure_workers()
     try:
-        response = requests.post(
-            f"{RELAY_SERVER_URL}{path}",
-            json=payload,
-            headers={"X-Relay-Token": RELAY_API_TOKEN},
-            timeout=2,
-        )
+        _queue.put_nowait((path, body))
+    except queue.Full:
+        logger.warning("Relay queue full, dropping event for %s", path)
+
+
+def _post_to_members(path: str, member_ids: list[int], key: str, data: dict):
+    """Send one event to several members; the body is serialized once and fanned out by the relay."""
+    if member_ids:
+        _post(path, {"memberIds": member_ids, key: data})
+
+
+def _deliver(path: str, body: bytes):
+    """POST a JSON body to the relay server, tripping the circuit breaker on repeated failures."""
+    global _fail_streak, _breaker_open_until
+    if time.monotonic() < _breaker_open_until:
+        return
+    try:
+        response = _session.post(_url(path), data=body, headers=_HEADERS, timeout=2)
         response.raise_for_status()
     except Exception as exc:
-        print(f"WARNING: Relay call to {path} failed: {exc}")
+        logger.warning("Relay call to %s failed: %s", path, exc)
+        _fail_streak += 1
+        if _fail_streak >= RELAY_BREAKER_FAILURES:
+            _breaker_open_until = time.monotonic() + RELAY_BREAKER_COOLDOWN_SECONDS
+            _fail_streak = 0
+            logger.warning("Relay unavailable, dropping events for %ss", RELAY_BREAKER_COOLDOWN_SECONDS)
+    else:
+        _fail_streak = 0
 
 
 def emit_new_message(receiver_id: int, message: dict):
@@ -77,6 +203,11 @@ def emit_message_deleted(user_id: int, message_id: int, conversation_id: int):
     })
 
 
+def emit_messages_deleted(user_id: int, deletions: list[dict]):
+    """Emit one batched deletion notification ({messageId, conversationId} items) to a user."""
+    _post("/relay/messages-deleted", {"userId": user_id, "deletions": deletions})
+
+
 def emit_message_edited(receiver_id: int, edit_data: dict):
     """Emit a message edited notification to the receiver."""
     _post("/relay/message-edited", {"receiverId": receiver_id, "editData": edit_data})
@@ -106,36 +237,75 @@ def emit_group_created(member_id: int, group_data: dict):
     _post("/relay/group-created", {"memberId": member_id, "group": group_data})
 
 
+def emit_group_created_for_members(member_ids: list[int], group_data: dict, encrypted_keys: dict):
+    """Notify several users that they were added to a group, each with their own encrypted group key."""
+    for member_id in member_ids:
+        _post("/relay/group-created", {
+            "memberId": member_id,
+            "group": {**group_data, "encryptedGroupKey": encrypted_keys.get(str(member_id))},
+        })
+
+
 def emit_group_message(member_id: int, message_data: dict):
     """Emit a new group message to a member."""
     _post("/relay/group-message", {"memberId": member_id, "data": message_data})
 
 
+def emit_group_message_bulk(member_ids: list[int], message_data: dict):
+    """Emit one new group message to several members."""
+    _post_to_members("/relay/group-message", member_ids, "data", message_data)
+
+
 def emit_group_member_added(member_id: int, data: dict):
     """Notify existing members about a new member."""
     _post("/relay/group-member-added", {"memberId": member_id, "data": data})
 
 
+def emit_group_member_added_bulk(member_ids: list[int], data: dict):
+    """Notify several existing members about a new member."""
+    _post_to_members("/relay/group-member-added", member_ids, "data", data)
+
+
 def emit_group_member_removed(member_id: int, data: dict):
     """Notify members about a removed member."""
     _post("/relay/group-member-removed", {"memberId": member_id, "data": data})
 
 
+def emit_group_member_removed_bulk(member_ids: list[int], data: dict):
+    """Notify several members about a removed member."""
+    _post_to_members("/relay/group-member-removed", member_ids, "data", data)
+
+
 def emit_group_deleted(member_id: int, data: dict):
     """Notify members that a group was deleted."""
     _post("/relay/group-deleted", {"memberId": member_id, "data": data})
 
 
+def emit_group_deleted_bulk(member_ids: list[int], data: dict):
+    """Notify several members that a group was deleted."""
+    _post_to_members("/relay/group-deleted", member_ids, "data", data)
+
+
 def emit_group_message_edited(member_id: int, edit_data: dict):
     """Notify members about an edited group message."""
     _post("/relay/group-message-edited", {"memberId": member_id, "editData": edit_data})
 
 
+def emit_group_message_edited_bulk(member_ids: list[int], edit_data: dict):
+    """Notify several members about an edited group message."""
+    _post_to_members("/relay/group-message-edited", member_ids, "editData", edit_data)
+
+
 def emit_group_message_unsent(member_id: int, unsent_data: dict):
     """Notify members about an unsent group message."""
     _post("/relay/group-message-unsent", {"memberId": member_id, "unsentData": unsent_data})
 
 
+def emit_group_message_unsent_bulk(member_ids: list[int], unsent_data: dict):
+    """Notify several members about an unsent group message."""
+    _post_to_members("/relay/group-message-unsent", member_ids, "unsentData", unsent_data)
+
+
 def emit_group_message_read(sender_id: int, read_data: dict):
     """Notify sender about group message read status."""
     _post("/relay/group-message-read", {"senderId": sender_id, "readData": read_data})
@@ -151,11 +321,30 @@ def emit_group_message_deleted(member_id: int, delete_data: dict):
     _post("/relay/group-message-deleted", {"memberId": member_id, "deleteData": delete_data})
 
 
+def emit_group_messages_deleted(member_id: int, group_id: int, message_ids: list[int]):
+    """Notify a member about several deleted messages in one group with a single event."""
+    _post("/relay/group-messages-deleted", {
+        "memberId": member_id,
+        "groupChatID": group_id,
+        "messageIds": message_ids,
+    })
+
+
 def emit_group_message_saved(member_id: int, save_data: dict):
     """Notify members about a saved/unsaved group message."""
     _post("/relay/group-message-saved", {"memberId": member_id, "saveData": save_data})
 
 
+def emit_group_message_saved_bulk(member_ids: list[int], save_data: dict):
+    """Notify several members about a saved/unsaved group message."""
+    _post_to_members("/relay/group-message-saved", member_ids, "saveData", save_data)
+
+
 def emit_group_updated(member_id: int, update_data: dict):
     """Notify members about group updates (name, profile picture, etc.)."""
     _post("/relay/group-updated", {"memberId": member_id, "updateData": update_data})
+
+
+def emit_group_updated_bulk(member_ids: list[int], update_data: dict):
+    """Notify several members about group updates."""
+    _post_to_members("/relay/group-updated", member_ids, "updateData", update_data)
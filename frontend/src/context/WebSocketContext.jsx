@@ -174,6 +174,14 @@ export function WebSocketProvider({ children }) {
       messageDeletedHandlersRef.current.forEach((handler) => handler(data));
     });
 
+    // Batched deletions (e.g. from the cleanup scheduler): fan out to the per-message handlers
+    newSocket.on("messages_deleted_event", (data) => {
+      console.log("Messages deleted event received:", data);
+      (data?.deletions || []).forEach((deletion) => {
+        messageDeletedHandlersRef.current.forEach((handler) => handler(deletion));
+      });
+    });
+
     newSocket.on("message_edited_event", (data) => {
       console.log("Message edited event received:", data);
       messageEditedHandlersRef.current.forEach((handler) => handler(data));
@@ -243,6 +251,15 @@ export function WebSocketProvider({ children }) {
       groupMessageDeletedHandlersRef.current.forEach((handler) => handler(data));
     });
 
+    newSocket.on("group_messages_deleted_event", (data) => {
+      console.log("Group messages deleted event received:", data);
+      (data?.messageIds || []).forEach((messageId) => {
+        groupMessageDeletedHandlersRef.current.forEach((handler) =>
+          handler({ groupChatID: data.groupChatID, messageId })
+        );
+      });
+    });
+
     newSocket.on("group_message_saved_event", (data) => {
       console.log("Group message saved event received:", data);
       groupMessageSavedHandlersRef.current.forEach((handler) => handler(data));
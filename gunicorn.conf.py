@@ -0,0 +1,24 @@
+"""
+Gunicorn settings for serving the backend API in production.
+
+Route handlers spend most of their time waiting on the database, so each
+worker runs gevent greenlets (the gevent worker monkey-patches the standard
+library on startup) instead of one blocking thread per request.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from __future__ import annotations
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+worker_class = "gevent"
+# One process by default: its greenlets already overlap database waits, and the
+# default SQLite database takes one writer at a time. Raising GUNICORN_WORKERS is
+# safe only while workers keep no request-visible state in memory (caches, rate
+# limits); anything like that must live in the database or another shared store.
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+timeout = 30
+keepalive = 5
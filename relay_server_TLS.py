@@ -3,8 +3,16 @@ TLS Relay Server - Port 5001
 Handles real-time encrypted message routing without decryption capability.
 Zero-knowledge relay server for end-to-end encrypted messaging.
 """
+from gevent import monkey
+monkey.patch_all()
+
+import hmac
+import logging
 import os
-from flask import Flask, request, abort, jsonify
+from functools import lru_cache
+from typing import NamedTuple
+import orjson
+from flask import Flask, request, abort
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
 
@@ -17,34 +25,79 @@ ALLOWED_ORIGINS = [origin for origin in DEFAULT_ORIGINS if origin]
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'websocket-relay-secret'
-CORS(app, resources={r"/*": {"origins": ALLOWED_ORIGINS or "*"}})
+# Only /health is browser-facing; /relay/* is server-to-server and Socket.IO applies its own CORS
+CORS(app, resources={r"/health": {"origins": ALLOWED_ORIGINS or "*"}})
 
+# Set RELAY_MESSAGE_QUEUE (e.g. redis://redis:6379/0) to run several relay processes that share rooms
 socketio = SocketIO(
     app,
     cors_allowed_origins=ALLOWED_ORIGINS or "*",
-    async_mode='eventlet'
+    async_mode='gevent',
+    message_queue=os.environ.get("RELAY_MESSAGE_QUEUE")
 )
 
-# Track connected users: {user_id: session_id}
+logger = logging.getLogger('relay')
+
+# Track connected users: {user_id: session_id}, plus the reverse index for disconnects
 connected_users = {}
+sid_to_user = {}
 API_TOKEN = os.environ.get("RELAY_API_TOKEN", "dev-relay-token")
+_API_TOKEN_BYTES = API_TOKEN.encode()
+_LOCAL_ADDRS = frozenset(("127.0.0.1", "::1"))
+_DOCKER_NETWORK_PREFIXES = ("172.", "10.")
 
 
 def _verify_api_request():
-    token = request.headers.get("X-Relay-Token")
-    if token != API_TOKEN:
+    token = request.headers.get("X-Relay-Token", "")
+    if not hmac.compare_digest(token.encode(), _API_TOKEN_BYTES):
         abort(401)
     # Allow requests from localhost OR Docker internal network (172.x.x.x, 10.x.x.x)
     # Since we have token auth, Docker network requests are safe
-    if not (request.remote_addr in {"127.0.0.1", "::1"} or
-            request.remote_addr.startswith(("172.", "10."))):
+    remote_addr = request.remote_addr or ""
+    if not (remote_addr in _LOCAL_ADDRS or remote_addr.startswith(_DOCKER_NETWORK_PREFIXES)):
         abort(403)
 
 
+def _json_in():
+    """Parse the request body with orjson; a missing or malformed body reads as {}."""
+    try:
+        data = orjson.loads(request.get_data(cache=False) or b'{}')
+    except orjson.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _json_out(obj, status=200):
+    return app.response_class(orjson.dumps(obj), status=status, mimetype='application/json')
+
+
+# Body of the success response every relay POST returns, encoded once
+_OK_BODY = orjson.dumps({'status': 'ok'})
+
+
+def _json_ok():
+    return app.response_class(_OK_BODY, mimetype='application/json')
+
+
+@lru_cache(maxsize=65536)
+def _user_room(user_id):
+    """Room name for a user's sockets, cached so hot emit paths reuse the same string."""
+    return f'user_{user_id}'
+
+
+def _member_rooms(data):
+    """User rooms for an event addressed to one memberId or to a memberIds list."""
+    member_ids = data.get('memberIds')
+    if isinstance(member_ids, list):
+        return [_user_room(member_id) for member_id in member_ids if member_id]
+    member_id = data.get('memberId')
+    return [_user_room(member_id)] if member_id else []
+
+
 @socketio.on('connect')
 def handle_connect():
     """Client connected to WebSocket."""
-    print(f'Client connected: {request.sid}')
+    logger.info('Client connected: %s', request.sid)
     emit('connected', {'message': 'Connected to relay server'})
 
 
@@ -52,13 +105,10 @@ def handle_connect():
 def handle_disconnect():
     """Client disconnected from WebSocket."""
     # Remove from connected users
-    user_id = None
-    for uid, sid in list(connected_users.items()):
-        if sid == request.sid:
-            user_id = uid
-            del connected_users[uid]
-            break
-    print(f'Client disconnected: {request.sid} (user {user_id})')
+    user_id = sid_to_user.pop(request.sid, None)
+    if user_id is not None and connected_users.get(user_id) == request.sid:
+        del connected_users[user_id]
+    logger.info('Client disconnected: %s (user %s)', request.sid, user_id)
 
 
 @socketio.on('authenticate')
@@ -67,8 +117,9 @@ def handle_authenticate(data):
     user_id = data.get('userId')
     if user_id:
         connected_users[user_id] = request.sid
-        join_room(f'user_{user_id}')
-        print(f'User {user_id} authenticated and joined room')
+        sid_to_user[request.sid] = user_id
+        join_room(_user_room(user_id))
+        logger.info('User %s authenticated and joined room', user_id)
         emit('authenticated', {'userId': user_id})
 
 
@@ -83,8 +134,8 @@ def handle_new_message(data):
 
     if receiver_id and message:
         # Emit to specific user's room
-        socketio.emit('message_received', {'message': message}, room=f'user_{receiver_id}')
-        print(f'Message relayed to user {receiver_id}')
+        socketio.emit('message_received', {'message': message}, room=_user_room(receiver_id))
+        logger.debug('Message relayed to user %s', receiver_id)
 
 
 @socketio.on('friend_request')
@@ -97,8 +148,8 @@ def handle_friend_request(data):
     request_data = data.get('request')
 
     if recipient_id and request_data:
-        socketio.emit('friend_request_received', {'request': request_data}, room=f'user_{recipient_id}')
-        print(f'Friend request sent to user {recipient_id}')
+        socketio.emit('friend_request_received', {'request': request_data}, room=_user_room(recipient_id))
+        logger.debug('Friend request sent to user %s', recipient_id)
 
 
 @socketio.on('friend_request_accepted')
@@ -111,8 +162,8 @@ def handle_friend_request_accepted(data):
     friend_data = data.get('friend')
 
     if requester_id and friend_data:
-        socketio.emit('friend_request_accepted_event', {'friend': friend_data}, room=f'user_{requester_id}')
-        print(f'Friend acceptance notification sent to user {requester_id}')
+        socketio.emit('friend_request_accepted_event', {'friend': friend_data}, room=_user_room(requester_id))
+        logger.debug('Friend acceptance notification sent to user %s', requester_id)
 
 
 @socketio.on('friend_deleted')
@@ -125,352 +176,118 @@ def handle_friend_deleted(data):
     deleter_data = data.get('deleter')
 
     if friend_id and deleter_data:
-        socketio.emit('friend_deleted_event', {'deleter': deleter_data}, room=f'user_{friend_id}')
-        print(f'Friend deletion notification sent to user {friend_id}')
+        socketio.emit('friend_deleted_event', {'deleter': deleter_data}, room=_user_room(friend_id))
+        logger.debug('Friend deletion notification sent to user %s', friend_id)
 
 
 @app.route('/health')
 def health():
     """Health check endpoint."""
-    return {'status': 'ok', 'connected_users': len(connected_users)}, 200
-
-
-@app.post('/relay/message')
-def relay_message_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    receiver_id = data.get('receiverId')
-    message = data.get('message')
-    if not receiver_id or not message:
-        return jsonify({'message': 'receiverId and message required'}), 400
-    socketio.emit('message_received', {'message': message}, room=f'user_{receiver_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/friend-request')
-def relay_friend_request_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    recipient_id = data.get('recipientId')
-    request_payload = data.get('request')
-    if not recipient_id or not request_payload:
-        return jsonify({'message': 'recipientId and request required'}), 400
-    socketio.emit('friend_request_received', {'request': request_payload}, room=f'user_{recipient_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/friend-accepted')
-def relay_friend_accepted_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    requester_id = data.get('requesterId')
-    friend_data = data.get('friend')
-    if not requester_id or not friend_data:
-        return jsonify({'message': 'requesterId and friend required'}), 400
-    print(f'Emitting friend_request_accepted_event to user_{requester_id} with friend: {friend_data.get("username", "unknown")}')
-    socketio.emit('friend_request_accepted_event', {'friend': friend_data}, room=f'user_{requester_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/friend-deleted')
-def relay_friend_deleted_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    friend_id = data.get('friendId')
-    deleter = data.get('deleter')
-    if not friend_id or not deleter:
-        return jsonify({'message': 'friendId and deleter required'}), 400
-    socketio.emit('friend_deleted_event', {'deleter': deleter}, room=f'user_{friend_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/friend-rejected')
-def relay_friend_rejected_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    requester_id = data.get('requesterId')
-    rejector_data = data.get('rejector')
-    if not requester_id or not rejector_data:
-        return jsonify({'message': 'requesterId and rejector required'}), 400
-    print(f'Emitting friend_request_rejected_event to user_{requester_id} from: {rejector_data.get("username", "unknown")}')
-    socketio.emit('friend_request_rejected_event', {'rejector': rejector_data}, room=f'user_{requester_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/friend-request-cancelled')
-def relay_friend_request_cancelled_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    recipient_id = data.get('recipientId')
-    canceller_data = data.get('canceller')
-    if not recipient_id or not canceller_data:
-        return jsonify({'message': 'recipientId and canceller required'}), 400
-    print(f'Emitting friend_request_cancelled_event to user_{recipient_id} from: {canceller_data.get("username", "unknown")}')
-    socketio.emit('friend_request_cancelled_event', {'canceller': canceller_data}, room=f'user_{recipient_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/user-blocked')
-def relay_user_blocked_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    blocked_user_id = data.get('blockedUserId')
-    blocker_data = data.get('blocker')
-    if not blocked_user_id or not blocker_data:
-        return jsonify({'message': 'blockedUserId and blocker required'}), 400
-    print(f'Emitting user_blocked_event to user_{blocked_user_id} by {blocker_data.get("username", "unknown")}')
-    socketio.emit('user_blocked_event', {'blocker': blocker_data}, room=f'user_{blocked_user_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/user-unblocked')
-def relay_user_unblocked_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    unblocked_user_id = data.get('unblockedUserId')
-    unblocker_data = data.get('unblocker')
-    if not unblocked_user_id or not unblocker_data:
-        return jsonify({'message': 'unblockedUserId and unblocker required'}), 400
-    print(f'Emitting user_unblocked_event to user_{unblocked_user_id} by {unblocker_data.get("username", "unknown")}')
-    socketio.emit('user_unblocked_event', {'unblocker': unblocker_data}, room=f'user_{unblocked_user_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/message-status')
-def relay_message_status_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    sender_id = data.get('senderId')
-    status_data = data.get('status')
-    if not sender_id or not status_data:
-        return jsonify({'message': 'senderId and status required'}), 400
-    print(f'Emitting message_status_update_event to user_{sender_id}: {status_data}')
-    socketio.emit('message_status_update_event', status_data, room=f'user_{sender_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/message-deleted')
-def relay_message_deleted_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    user_id = data.get('userId')
-    message_id = data.get('messageId')
-    conversation_id = data.get('conversationId')
-    if not user_id or not message_id or not conversation_id:
-        return jsonify({'message': 'userId, messageId, and conversationId required'}), 400
-    print(f'Emitting message_deleted_event to user_{user_id}: message {message_id}')
-    socketio.emit('message_deleted_event', {
-        'messageId': message_id,
-        'conversationId': conversation_id
-    }, room=f'user_{user_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/message-edited')
-def relay_message_edited_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    receiver_id = data.get('receiverId')
-    edit_data = data.get('editData')
-    if not receiver_id or not edit_data:
-        return jsonify({'message': 'receiverId and editData required'}), 400
-    print(f'Emitting message_edited_event to user_{receiver_id}: message {edit_data.get("messageId")}')
-    socketio.emit('message_edited_event', edit_data, room=f'user_{receiver_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/message-unsent')
-def relay_message_unsent_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    receiver_id = data.get('receiverId')
-    unsent_data = data.get('unsentData')
-    if not receiver_id or not unsent_data:
-        return jsonify({'message': 'receiverId and unsentData required'}), 400
-    print(f'Emitting message_unsent_event to user_{receiver_id}: message {unsent_data.get("messageId")}')
-    socketio.emit('message_unsent_event', unsent_data, room=f'user_{receiver_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/message-saved')
-def relay_message_saved_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    receiver_id = data.get('receiverId')
-    message_id = data.get('messageId')
-    conversation_id = data.get('conversationId')
-    saved = data.get('saved')
-    if not receiver_id or message_id is None or conversation_id is None or saved is None:
-        return jsonify({'message': 'receiverId, messageId, conversationId, and saved required'}), 400
-    print(f'Emitting message_saved_event to user_{receiver_id}: message {message_id} saved={saved}')
-    socketio.emit('message_saved_event', {
-        'messageId': message_id,
-        'conversationId': conversation_id,
-        'saved': saved
-    }, room=f'user_{receiver_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-# ============================================================================
-# GROUP CHAT RELAY ENDPOINTS
-# ============================================================================
-
-@app.post('/relay/group-created')
-def relay_group_created_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    group_data = data.get('group')
-    if not member_id or not group_data:
-        return jsonify({'message': 'memberId and group required'}), 400
-    print(f'Emitting group_created_event to user_{member_id}')
-    socketio.emit('group_created_event', {'group': group_data}, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/group-message')
-def relay_group_message_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    message_data = data.get('data')
-    if not member_id or not message_data:
-        return jsonify({'message': 'memberId and data required'}), 400
-    print(f'Emitting group_message_received to user_{member_id}')
-    socketio.emit('group_message_received', message_data, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/group-member-added')
-def relay_group_member_added_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    member_data = data.get('data')
-    if not member_id or not member_data:
-        return jsonify({'message': 'memberId and data required'}), 400
-    print(f'Emitting group_member_added_event to user_{member_id}')
-    socketio.emit('group_member_added_event', member_data, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/group-member-removed')
-def relay_group_member_removed_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    remove_data = data.get('data')
-    if not member_id or not remove_data:
-        return jsonify({'message': 'memberId and data required'}), 400
-    print(f'Emitting group_member_removed_event to user_{member_id}')
-    socketio.emit('group_member_removed_event', remove_data, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/group-deleted')
-def relay_group_deleted_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    delete_data = data.get('data')
-    if not member_id or not delete_data:
-        return jsonify({'message': 'memberId and data required'}), 400
-    print(f'Emitting group_deleted_event to user_{member_id}')
-    socketio.emit('group_deleted_event', delete_data, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/group-message-edited')
-def relay_group_message_edited_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    edit_data = data.get('editData')
-    if not member_id or not edit_data:
-        return jsonify({'message': 'memberId and editData required'}), 400
-    print(f'Emitting group_message_edited_event to user_{member_id}')
-    socketio.emit('group_message_edited_event', edit_data, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/group-message-unsent')
-def relay_group_message_unsent_http():
+    return _json_out({'status': 'ok', 'connected_users': len(connected_users)})
+
+
+class RelayRoute(NamedTuple):
+    """How a /relay/<key> request from the backend becomes a Socket.IO event."""
+    event: str
+    recipient: str  # Payload key holding the target user ID; 'memberIds' also accepts a single memberId
+    fields: tuple  # Required payload keys forwarded to the client
+    raw: bool = False  # Emit the single field's value as-is instead of wrapping the fields in a dict
+    falsy_ok: bool = False  # Only None counts as missing (for IDs and booleans that may be 0/False)
+
+
+RELAY_ROUTES = {
+    'message': RelayRoute('message_received', 'receiverId', ('message',)),
+    'friend-request': RelayRoute('friend_request_received', 'recipientId', ('request',)),
+    'friend-accepted': RelayRoute('friend_request_accepted_event', 'requesterId', ('friend',)),
+    'friend-deleted': RelayRoute('friend_deleted_event', 'friendId', ('deleter',)),
+    'friend-rejected': RelayRoute('friend_request_rejected_event', 'requesterId', ('rejector',)),
+    'friend-request-cancelled': RelayRoute('friend_request_cancelled_event', 'recipientId', ('canceller',)),
+    'user-blocked': RelayRoute('user_blocked_event', 'blockedUserId', ('blocker',)),
+    'user-unblocked': RelayRoute('user_unblocked_event', 'unblockedUserId', ('unblocker',)),
+    'message-status': RelayRoute('message_status_update_event', 'senderId', ('status',), raw=True),
+    'message-deleted': RelayRoute('message_deleted_event', 'userId', ('messageId', 'conversationId')),
+    'messages-deleted': RelayRoute('messages_deleted_event', 'userId', ('deletions',)),
+    'message-edited': RelayRoute('message_edited_event', 'receiverId', ('editData',), raw=True),
+    'message-unsent': RelayRoute('message_unsent_event', 'receiverId', ('unsentData',), raw=True),
+    'message-saved': RelayRoute(
+        'message_saved_event', 'receiverId', ('messageId', 'conversationId', 'saved'), falsy_ok=True
+    ),
+
+    # Group chat events
+    'group-created': RelayRoute('group_created_event', 'memberId', ('group',)),
+    'group-message': RelayRoute('group_message_received', 'memberIds', ('data',), raw=True),
+    'group-member-added': RelayRoute('group_member_added_event', 'memberIds', ('data',), raw=True),
+    'group-member-removed': RelayRoute('group_member_removed_event', 'memberIds', ('data',), raw=True),
+    'group-deleted': RelayRoute('group_deleted_event', 'memberIds', ('data',), raw=True),
+    'group-message-edited': RelayRoute('group_message_edited_event', 'memberIds', ('editData',), raw=True),
+    'group-message-unsent': RelayRoute('group_message_unsent_event', 'memberIds', ('unsentData',), raw=True),
+    'group-message-read': RelayRoute('group_message_read_event', 'senderId', ('readData',), raw=True),
+    'group-key-rotated': RelayRoute('group_key_rotated_event', 'memberId', ('keyData',), raw=True),
+    'group-message-deleted': RelayRoute('group_message_deleted_event', 'memberId', ('deleteData',), raw=True),
+    'group-messages-deleted': RelayRoute('group_messages_deleted_event', 'memberId', ('groupChatID', 'messageIds')),
+    'group-message-saved': RelayRoute('group_message_saved_event', 'memberIds', ('saveData',), raw=True),
+    'group-updated': RelayRoute('group_updated_event', 'memberIds', ('updateData',), raw=True),
+}
+
+
+def _dispatch(route, data):
+    """Emit one backend event described by route; returns an error message if the payload is incomplete."""
+    if route.recipient == 'memberIds':
+        room = _member_rooms(data)
+    else:
+        recipient_id = data.get(route.recipient)
+        room = _user_room(recipient_id) if recipient_id else None
+
+    values = [data.get(field) for field in route.fields]
+    if route.falsy_ok:
+        missing = any(value is None for value in values)
+    else:
+        missing = not all(values)
+    if not room or missing:
+        return f"{route.recipient} and {', '.join(route.fields)} required"
+
+    payload = values[0] if route.raw else dict(zip(route.fields, values))
+    logger.debug('Emitting %s to %s', route.event, room)
+    socketio.emit(route.event, payload, room=room)
+    return None
+
+
+@app.post('/relay/<key>')
+def relay_event_http(key):
+    route = RELAY_ROUTES.get(key)
+    if route is None:
+        abort(404)
     _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    unsent_data = data.get('unsentData')
-    if not member_id or not unsent_data:
-        return jsonify({'message': 'memberId and unsentData required'}), 400
-    print(f'Emitting group_message_unsent_event to user_{member_id}')
-    socketio.emit('group_message_unsent_event', unsent_data, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/group-message-read')
-def relay_group_message_read_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    sender_id = data.get('senderId')
-    read_data = data.get('readData')
-    if not sender_id or not read_data:
-        return jsonify({'message': 'senderId and readData required'}), 400
-    print(f'Emitting group_message_read_event to user_{sender_id}')
-    socketio.emit('group_message_read_event', read_data, room=f'user_{sender_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/group-key-rotated')
-def relay_group_key_rotated_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    key_data = data.get('keyData')
-    if not member_id or not key_data:
-        return jsonify({'message': 'memberId and keyData required'}), 400
-    print(f'Emitting group_key_rotated_event to user_{member_id}')
-    socketio.emit('group_key_rotated_event', key_data, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
+    error = _dispatch(route, _json_in())
+    if error:
+        return _json_out({'message': error}, 400)
+    return _json_ok()
 
 
-@app.post('/relay/group-message-deleted')
-def relay_group_message_deleted_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    delete_data = data.get('deleteData')
-    if not member_id or not delete_data:
-        return jsonify({'message': 'memberId and deleteData required'}), 400
-    print(f'Emitting group_message_deleted_event to user_{member_id}')
-    socketio.emit('group_message_deleted_event', delete_data, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/group-message-saved')
-def relay_group_message_saved_http():
-    _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    save_data = data.get('saveData')
-    if not member_id or not save_data:
-        return jsonify({'message': 'memberId and saveData required'}), 400
-    print(f'Emitting group_message_saved_event to user_{member_id}')
-    socketio.emit('group_message_saved_event', save_data, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
-
-
-@app.post('/relay/group-updated')
-def relay_group_updated_http():
+@app.post('/relay/batch')
+def relay_batch_http():
+    """
+    Dispatch several relay events sent in one request.
+    Data: {events: [{path, body}, ...]} where each body is what the single-event endpoint expects.
+    """
     _verify_api_request()
-    data = request.get_json(silent=True) or {}
-    member_id = data.get('memberId')
-    update_data = data.get('updateData')
-    if not member_id or not update_data:
-        return jsonify({'message': 'memberId and updateData required'}), 400
-    print(f'Emitting group_updated_event to user_{member_id} for group {update_data.get("groupChatID")}')
-    socketio.emit('group_updated_event', update_data, room=f'user_{member_id}')
-    return jsonify({'status': 'ok'}), 200
-
+    data = _json_in()
+    events = data.get('events')
+    if not isinstance(events, list):
+        return _json_out({'message': 'events required'}, 400)
+
+    failed = 0
+    for event in events:
+        path = event.get('path') if isinstance(event, dict) else None
+        route = RELAY_ROUTES.get(path.removeprefix('/relay/')) if isinstance(path, str) else None
+        body = event.get('body') if route else None
+        if not isinstance(body, dict) or _dispatch(route, body):
+            failed += 1
+    return _json_out({'status': 'ok', 'dispatched': len(events) - failed, 'failed': failed})
 
 if __name__ == '__main__':
+    # Only warnings by default; RELAY_LOG_LEVEL=INFO adds connections, DEBUG traces every emit
+    logging.basicConfig(level=os.environ.get("RELAY_LOG_LEVEL", "WARNING").upper(), format="%(message)s")
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
     print('Starting TLS Relay Server on port 5001...')
-    socketio.run(app, host='0.0.0.0', port=5001, debug=True)
+    socketio.run(app, host='0.0.0.0', port=5001, debug=False, use_reloader=False, log_output=False)
@@ -8,21 +8,32 @@ based on per-user retention settings.
 Usage:
     python scheduler.py
 """
+import logging
+import os
 import time
 from datetime import datetime
 
 from backend import create_app
 from backend.utils.cleanup_manager import cleanup_expired_messages, cleanup_unsent_placeholders, cleanup_expired_group_messages
 
+# Idle runs double the sleep up to the maximum; any run that does work resets it to the minimum
+MIN_INTERVAL_SECONDS = 5
+MAX_INTERVAL_SECONDS = int(os.environ.get("CLEANUP_MAX_INTERVAL_SECONDS", "60"))
+# 1-1 cleanup stops after the batch that passes this budget; the next run picks up the rest
+MAX_RUNTIME_SECONDS = float(os.environ.get("CLEANUP_MAX_RUNTIME_SECONDS", "30"))
 
-def run_cleanup_job():
-    """Run the cleanup job within application context."""
-    app = create_app()
+
+def run_cleanup_job(app):
+    """
+    Run the cleanup job within a fresh application context (and so a fresh DB session).
+
+    Returns the number of messages and placeholders changed.
+    """
     with app.app_context():
         print(f"\n[{datetime.utcnow().isoformat()}] Running cleanup job...")
 
         # Cleanup expired 1-1 messages
-        result = cleanup_expired_messages()
+        result = cleanup_expired_messages(max_runtime_seconds=MAX_RUNTIME_SECONDS)
         print(f"  [1-1] Hard deleted: {result['hard_deleted_count']} messages")
         print(f"  [1-1] Soft deleted: {result['soft_deleted_count']} messages")
         print(f"  [1-1] Total modified: {result['messages_modified']} messages")
@@ -39,18 +50,33 @@ def run_cleanup_job():
         unsent_result = cleanup_unsent_placeholders()
         print(f"  Unsent placeholders removed: {unsent_result['deleted_placeholder_count']}")
 
+        return (
+            result['messages_modified']
+            + group_result['messages_modified']
+            + unsent_result['deleted_placeholder_count']
+        )
+
 
 def main():
-    """Run cleanup job every 5 seconds."""
+    """Run the cleanup job every 5 seconds while there is work, backing off when idle."""
+    # Cleanup details are logged at DEBUG; set CLEANUP_LOG_LEVEL=DEBUG to trace each message
+    logging.basicConfig(level=os.environ.get("CLEANUP_LOG_LEVEL", "INFO").upper(), format="%(message)s")
     print("Starting message cleanup scheduler...")
-    print("Runs every 5 seconds for real-time deletion")
+    print(f"Runs every {MIN_INTERVAL_SECONDS}-{MAX_INTERVAL_SECONDS} seconds, more often while messages are expiring")
     print("Press Ctrl+C to stop")
 
+    # Build the app once; each run only pushes a new context so the connection pool stays warm
+    app = create_app()
+
+    interval = MIN_INTERVAL_SECONDS
     try:
         while True:
-            run_cleanup_job()
-            print(f"Sleeping for 5 seconds...")
-            time.sleep(5)  # Run every 5 seconds for near-real-time deletion
+            if run_cleanup_job(app):
+                interval = MIN_INTERVAL_SECONDS
+            else:
+                interval = min(interval * 2, MAX_INTERVAL_SECONDS)
+            print(f"Sleeping for {interval} seconds...")
+            time.sleep(interval)
     except KeyboardInterrupt:
         print("\nScheduler stopped by user")
 
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+Migration script to add the partial indexes used by message cleanup.
+
+- ix_message_fully_deleted: 1-1 messages deleted for both the sender and the
+  receiver, which the scheduler hard-deletes.
+- ix_message_live_direct: 1-1 messages still visible to someone, which the
+  scheduler walks in msgID order looking for expired ones.
+
+Both let cleanup avoid scanning the whole message table. New databases get
+them from db.create_all().
+
+Safe to re-run; indexes are only created if missing.
+"""
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from sqlite_utils import refresh_statistics, tune_connection
+
+ROOT = Path(__file__).resolve().parent.parent
+DB_PATH = ROOT / "instance" / "app.db"
+
+
+def main() -> None:
+    if not DB_PATH.exists():
+        raise SystemExit(f"SQLite database not found at {DB_PATH}. Did you run the backend once?")
+
+    conn = sqlite3.connect(DB_PATH)
+    tune_connection(conn)
+    # One transaction for all the DDL; sqlite3 would otherwise commit each statement separately
+    with conn:
+        conn.execute("BEGIN")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_message_fully_deleted ON message (msgID) "
+            "WHERE deleted_for_sender = 1 AND deleted_for_receiver = 1"
+        )
+        # Predicate must match the one SQLAlchemy renders for the cleanup query
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_message_live_direct ON message (\"msgID\") "
+            "WHERE \"groupChatID\" IS NULL AND NOT (deleted_for_sender = 1 AND deleted_for_receiver = 1)"
+        )
+    refresh_statistics(conn)
+    conn.close()
+
+    print("Cleanup indexes are present on message.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Migration script to add raw profile picture columns to the user table.
+
+Profile pictures are now stored as raw bytes plus a MIME type instead of a
+base64 data URL in `prof_pic_url`. Existing data URLs keep working; new uploads
+use the new columns. `prof_pic_token` holds the random token the picture URL
+must carry to be served.
+
+Safe to re-run; columns that already exist are skipped.
+"""
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from sqlite_utils import existing_columns, tune_connection
+
+ROOT = Path(__file__).resolve().parent.parent
+DB_PATH = ROOT / "instance" / "app.db"
+
+# Column definitions (column name -> SQL fragment for ALTER TABLE)
+COLUMNS = {
+    "prof_pic_mime": "VARCHAR(32)",
+    "prof_pic_blob": "BLOB",
+    "prof_pic_token": "VARCHAR(32)",
+}
+
+
+def main() -> None:
+    if not DB_PATH.exists():
+        raise SystemExit(f"SQLite database not found at {DB_PATH}. Did you run the backend once?")
+
+    conn = sqlite3.connect(DB_PATH)
+    tune_connection(conn)
+    cursor = conn.cursor()
+
+    added = []
+    # One transaction for all the DDL; sqlite3 would otherwise commit each statement separately
+    with conn:
+        cursor.execute("BEGIN")
+        existing = existing_columns(cursor, "user")
+        for column, definition in COLUMNS.items():
+            if column in existing:
+                continue
+            cursor.execute(f'ALTER TABLE "user" ADD COLUMN {column} {definition}')
+            added.append(column)
+
+    conn.close()
+
+    if added:
+        print(f"Added columns to user table: {', '.join(added)}")
+    else:
+        print("User table already contains the profile picture columns.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Migration script to add the public_key_json column to the public_key table.
+
+The column stores each key's serialized payload so the key lookup endpoints can
+return it without re-encoding. Existing rows are backfilled here; rows left
+NULL are still served correctly (they are encoded on read).
+
+Safe to re-run; the column is only added if missing and only NULL rows are backfilled.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from sqlite_utils import existing_columns, tune_connection
+
+ROOT = Path(__file__).resolve().parent.parent
+DB_PATH = ROOT / "instance" / "app.db"
+
+
+def _created_at_iso(value: str | None) -> str | None:
+    # Match datetime.isoformat() as produced by PublicKey.to_dict()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        return value
+
+
+def main() -> None:
+    if not DB_PATH.exists():
+        raise SystemExit(f"SQLite database not found at {DB_PATH}. Did you run the backend once?")
+
+    conn = sqlite3.connect(DB_PATH)
+    tune_connection(conn)
+    cursor = conn.cursor()
+
+    # Add the column and backfill it in one transaction (sqlite3 would otherwise commit the ALTER on its own)
+    with conn:
+        cursor.execute("BEGIN")
+        if "public_key_json" in existing_columns(cursor, "public_key"):
+            print("public_key.public_key_json already exists.")
+        else:
+            cursor.execute("ALTER TABLE public_key ADD COLUMN public_key_json TEXT")
+            print("Added public_key.public_key_json.")
+
+        cursor.execute(
+            "SELECT keyID, userID, publicKey, algorithm, created_at FROM public_key WHERE public_key_json IS NULL"
+        )
+        rows = cursor.fetchall()
+        cursor.executemany(
+            "UPDATE public_key SET public_key_json = ? WHERE keyID = ?",
+            [
+                (
+                    json.dumps(
+                        {
+                            "keyID": key_id,
+                            "userID": user_id,
+                            "publicKey": public_key,
+                            "algorithm": algorithm,
+                            "createdAt": _created_at_iso(created_at),
+                        },
+                        separators=(",", ":"),
+                    ),
+                    key_id,
+                )
+                for key_id, user_id, public_key, algorithm, created_at in rows
+            ],
+        )
+
+    conn.close()
+
+    print(f"Backfilled {len(rows)} public key row(s).")
+
+
+if __name__ == "__main__":
+    main()
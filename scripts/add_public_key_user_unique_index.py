@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Migration script to make public_key.userID unique.
+
+register_public_key inserts with ON CONFLICT (userID) DO NOTHING, which SQLite
+only accepts when a UNIQUE index covers userID. New databases get it from
+db.create_all(); older ones still have the plain ix_public_key_userID index,
+which this script rebuilds as a unique one.
+
+The script stops without changes if any user has more than one key; resolve
+those rows first.
+
+Safe to re-run; an index that is already unique is left alone.
+"""
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from sqlite_utils import refresh_statistics, tune_connection
+
+ROOT = Path(__file__).resolve().parent.parent
+DB_PATH = ROOT / "instance" / "app.db"
+
+INDEX_NAME = "ix_public_key_userID"
+
+
+def main() -> None:
+    if not DB_PATH.exists():
+        raise SystemExit(f"SQLite database not found at {DB_PATH}. Did you run the backend once?")
+
+    conn = sqlite3.connect(DB_PATH)
+    tune_connection(conn)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT \"unique\" FROM pragma_index_list('public_key') WHERE name = ?", (INDEX_NAME,))
+    row = cursor.fetchone()
+    if row and row[0]:
+        conn.close()
+        print(f"⊙ {INDEX_NAME} is already unique")
+        return
+
+    cursor.execute("SELECT userID, COUNT(*) FROM public_key GROUP BY userID HAVING COUNT(*) > 1")
+    duplicates = cursor.fetchall()
+    if duplicates:
+        conn.close()
+        listed = ", ".join(f"user {user_id} ({count} keys)" for user_id, count in duplicates)
+        raise SystemExit(f"Cannot add a unique index: more than one public key for {listed}.")
+
+    # One transaction so the table is never left without its userID index
+    with conn:
+        cursor.execute("BEGIN")
+        cursor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+        cursor.execute(f'CREATE UNIQUE INDEX {INDEX_NAME} ON public_key ("userID")')
+    refresh_statistics(conn)
+    conn.close()
+
+    print(f"✓ Rebuilt {INDEX_NAME} as a unique index")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ Migration script to add timer_reset_at columns to message and group_message_stat
 This enables the timer reset feature: when a user unsaves a message, the deletion
 timer restarts from the current time rather than deleting on the next scheduler sweep.
 
+Both columns get partial indexes covering only rows where the timer was reset.
+
 Safe to re-run; columns that already exist are skipped.
 """
 from __future__ import annotations
@@ -12,44 +14,61 @@ from __future__ import annotations
 import sqlite3
 from pathlib import Path
 
+from sqlite_utils import existing_columns, refresh_statistics, tune_connection
+
 ROOT = Path(__file__).resolve().parent.parent
 DB_PATH = ROOT / "instance" / "app.db"
 
 
-def column_exists(cursor: sqlite3.Cursor, table: str, column: str) -> bool:
-    """Check if a column exists in a table."""
-    cursor.execute(f"PRAGMA table_info({table})")
-    return any(row[1] == column for row in cursor.fetchall())
-
-
 def main() -> None:
     if not DB_PATH.exists():
         raise SystemExit(f"SQLite database not found at {DB_PATH}. Did you run the backend once?")
 
     conn = sqlite3.connect(DB_PATH)
+    tune_connection(conn)
     cursor = conn.cursor()
 
     added = []
 
-    # Add timer_reset_at to message table
-    if not column_exists(cursor, "message", "timer_reset_at"):
-        cursor.execute("ALTER TABLE message ADD COLUMN timer_reset_at DATETIME")
-        cursor.execute("CREATE INDEX IF NOT EXISTS ix_message_timer_reset_at ON message (timer_reset_at)")
-        added.append("message.timer_reset_at")
-        print("✓ Added timer_reset_at column to message table")
-    else:
-        print("⊙ message.timer_reset_at already exists")
-
-    # Add timer_reset_at to group_message_status table
-    if not column_exists(cursor, "group_message_status", "timer_reset_at"):
-        cursor.execute("ALTER TABLE group_message_status ADD COLUMN timer_reset_at DATETIME")
-        cursor.execute("CREATE INDEX IF NOT EXISTS ix_group_message_status_timer_reset_at ON group_message_status (timer_reset_at)")
-        added.append("group_message_status.timer_reset_at")
-        print("✓ Added timer_reset_at column to group_message_status table")
-    else:
-        print("⊙ group_message_status.timer_reset_at already exists")
+    # One transaction for all the DDL; sqlite3 would otherwise commit each statement separately
+    with conn:
+        cursor.execute("BEGIN")
+
+        # Add timer_reset_at to message table
+        if "timer_reset_at" not in existing_columns(cursor, "message"):
+            cursor.execute("ALTER TABLE message ADD COLUMN timer_reset_at DATETIME")
+            added.append("message.timer_reset_at")
+            print("✓ Added timer_reset_at column to message table")
+        else:
+            print("⊙ message.timer_reset_at already exists")
+
+        # Add timer_reset_at to group_message_status table
+        if "timer_reset_at" not in existing_columns(cursor, "group_message_status"):
+            cursor.execute("ALTER TABLE group_message_status ADD COLUMN timer_reset_at DATETIME")
+            added.append("group_message_status.timer_reset_at")
+            print("✓ Added timer_reset_at column to group_message_status table")
+        else:
+            print("⊙ group_message_status.timer_reset_at already exists")
+
+        # Partial indexes: most rows never have a timer reset, so NULLs are left out.
+        # Rebuild any full index left by an older version of this script.
+        for table in ("message", "group_message_status"):
+            index = f"ix_{table}_timer_reset_at"
+            cursor.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (index,)
+            )
+            row = cursor.fetchone()
+            if row and "WHERE" in row[0].upper():
+                continue
+            cursor.execute(f"DROP INDEX IF EXISTS {index}")
+            cursor.execute(
+                f"CREATE INDEX {index} ON {table} (timer_reset_at) WHERE timer_reset_at IS NOT NULL"
+            )
+            added.append(f"{index} (partial)")
+            print(f"✓ Built partial index {index}")
 
-    conn.commit()
+    if added:
+        refresh_statistics(conn)
     conn.close()
 
     if added:
@@ -3,38 +3,104 @@
 
 from __future__ import annotations
 
+import os
+import time
 from datetime import datetime
 
+from sqlalchemy import delete, text, tuple_, update
+
 from backend import create_app, db
-from backend.models import Message
+from backend.models import GroupMessageStatus, Message
+
+try:
+    from sqlite_utils import performance_pragmas
+except ImportError:  # run as a module (python -m scripts.cleanup_expired_messages)
+    from scripts.sqlite_utils import performance_pragmas
+
+BATCH_SIZE = int(os.environ.get("PURGE_BATCH_SIZE", "5000"))
+# Pause between full batches so live requests can take SQLite's write lock
+BATCH_DELAY_SECONDS = float(os.environ.get("PURGE_BATCH_DELAY_MS", "50")) / 1000.0
+# Purges at least this large return free pages to the OS when auto_vacuum=INCREMENTAL
+VACUUM_THRESHOLD = 10000
+
+
+def tune_sqlite_session() -> None:
+    """Speed up the bulk deletes when the app runs on SQLite (no-op for other databases)."""
+    if db.engine.dialect.name != "sqlite":
+        return
+    journal_mode = db.session.execute(text("PRAGMA journal_mode")).scalar()
+    for pragma in performance_pragmas(journal_mode):
+        db.session.execute(text(pragma))
+
 
-BATCH_SIZE = 500
+def reclaim_free_pages() -> None:
+    """Release the pages a purge freed, if the SQLite database was created with auto_vacuum=INCREMENTAL.
 
+    Switching an existing database to incremental mode needs `PRAGMA auto_vacuum=INCREMENTAL`
+    followed by a full `VACUUM`, which rewrites the whole file; do that offline.
+    """
+    if db.engine.dialect.name != "sqlite":
+        return
+    if db.session.execute(text("PRAGMA auto_vacuum")).scalar() != 2:  # 2 = INCREMENTAL
+        return
+    db.session.commit()
+    # executescript steps the pragma to completion; a plain execute frees a single page
+    raw = db.engine.raw_connection()
+    try:
+        raw.driver_connection.executescript("PRAGMA incremental_vacuum")
+    finally:
+        raw.close()
+    print("Reclaimed free pages.")
 
-def purge_expired_messages() -> int:
+
+def purge_expired_messages(batch_size: int = BATCH_SIZE) -> int:
     """Delete expired messages in batches to avoid locking the table."""
+    now = datetime.utcnow()
     total_deleted = 0
+    last_key = None
     while True:
-        expired = (
-            Message.query.filter(Message.expiryTime <= datetime.utcnow())
-            .order_by(Message.expiryTime.asc())
-            .limit(BATCH_SIZE)
-            .all()
-        )
-        if not expired:
+        query = db.session.query(Message.expiryTime, Message.msgID).filter(Message.expiryTime <= now)
+        if last_key is not None:
+            # Keyset cursor: resume after the last deleted row. A row-value compare (unlike an
+            # OR of the two cases) stays a single range scan of the expiryTime index, with no sort.
+            query = query.filter(tuple_(Message.expiryTime, Message.msgID) > tuple_(*last_key))
+        batch = query.order_by(Message.expiryTime.asc(), Message.msgID.asc()).limit(batch_size).all()
+        if not batch:
             break
-        for message in expired:
-            db.session.delete(message)
+        last_key = tuple(batch[-1])
+        batch_ids = [msg_id for _, msg_id in batch]
+        # Bulk statements skip ORM cascades, so clear dependents the way the FKs would
+        db.session.execute(
+            delete(GroupMessageStatus).where(GroupMessageStatus.msgID.in_(batch_ids)),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.execute(
+            update(Message).where(Message.reply_to_id.in_(batch_ids)).values(reply_to_id=None),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.execute(
+            delete(Message).where(Message.msgID.in_(batch_ids)),
+            execution_options={"synchronize_session": False},
+        )
         db.session.commit()
-        total_deleted += len(expired)
+        total_deleted += len(batch_ids)
+        if len(batch_ids) == batch_size and BATCH_DELAY_SECONDS > 0:
+            time.sleep(BATCH_DELAY_SECONDS)
     return total_deleted
 
 
 def main() -> None:
     app = create_app()
     with app.app_context():
+        tune_sqlite_session()
+        print(f"Purging in batches of {BATCH_SIZE} with a {BATCH_DELAY_SECONDS * 1000:.0f} ms pause.")
         deleted = purge_expired_messages()
+        if deleted and db.engine.dialect.name == "sqlite":
+            # Refresh planner statistics after a large delete (usually a no-op)
+            db.session.execute(text("PRAGMA optimize"))
         print(f"Deleted {deleted} expired messages.")
+        if deleted >= VACUUM_THRESHOLD:
+            reclaim_free_pages()
 
 
 if __name__ == "__main__":
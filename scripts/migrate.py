@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Run every pending migration script against instance/app.db, in order.
+
+Applied migrations are recorded in a schema_migrations table, so a re-run
+costs one indexed lookup per migration instead of re-inspecting the schema.
+The individual scripts remain safe to run on their own.
+"""
+from __future__ import annotations
+
+import importlib
+import sqlite3
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DB_PATH = ROOT / "instance" / "app.db"
+
+# (version, script module) in the order they were introduced; only ever append
+MIGRATIONS = [
+    (1, "upgrade_message_schema"),
+    (2, "add_timer_reset_columns"),
+    (3, "add_profile_picture_columns"),
+    (4, "add_public_key_json_column"),
+    (5, "add_message_cleanup_index"),
+    (6, "add_public_key_user_unique_index"),
+    # Re-run to add prof_pic_token to databases that already applied version 3
+    (7, "add_profile_picture_columns"),
+]
+
+
+def main() -> None:
+    if not DB_PATH.exists():
+        raise SystemExit(f"SQLite database not found at {DB_PATH}. Did you run the backend once?")
+
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at DATETIME NOT NULL)"
+        )
+    applied = {version for (version,) in conn.execute("SELECT version FROM schema_migrations")}
+
+    pending = [(version, name) for version, name in MIGRATIONS if version not in applied]
+    for version, name in pending:
+        print(f"→ Running {name}")
+        importlib.import_module(name).main()
+        with conn:
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+                (version, name),
+            )
+    conn.close()
+
+    if pending:
+        print(f"\n✓ Applied {len(pending)} migration(s).")
+    else:
+        print("⊙ No pending migrations. Database already up to date.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Helpers shared by the SQLite maintenance scripts in this folder.
+
+Imports nothing from backend, so any script here can use it.
+
+Run the scripts directly (python scripts/<name>.py) so this module is importable.
+"""
+from __future__ import annotations
+
+import sqlite3
+
+# Per-connection settings for one-off bulk work: a bigger page cache and memory-mapped
+# reads for the table rewrites behind ALTER TABLE and CREATE INDEX.
+PERFORMANCE_PRAGMAS = (
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+# Fewer fsyncs; only safe in WAL mode (with a rollback journal, NORMAL can corrupt the
+# database on power loss), so it is applied only when the database already uses WAL.
+WAL_ONLY_PRAGMAS = ("PRAGMA synchronous=NORMAL",)
+
+
+def performance_pragmas(journal_mode: str) -> tuple[str, ...]:
+    """The pragmas to apply for a database in the given journal mode."""
+    if journal_mode.lower() == "wal":
+        return PERFORMANCE_PRAGMAS + WAL_ONLY_PRAGMAS
+    return PERFORMANCE_PRAGMAS
+
+
+def tune_connection(conn: sqlite3.Connection) -> None:
+    """Apply the performance pragmas to a freshly opened connection."""
+    (journal_mode,) = conn.execute("PRAGMA journal_mode").fetchone()
+    for pragma in performance_pragmas(journal_mode):
+        conn.execute(pragma)
+
+
+def existing_columns(cursor: sqlite3.Cursor, table: str) -> set[str]:
+    """Names of the columns currently defined on table, read with a single query."""
+    # Table-valued form takes the name as a bound parameter instead of splicing it into the SQL
+    cursor.execute("SELECT name FROM pragma_table_info(?)", (table,))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def refresh_statistics(conn: sqlite3.Connection) -> None:
+    """Let SQLite re-ANALYZE (bounded) any tables whose shape changed, so the planner sees new indexes."""
+    conn.execute("PRAGMA analysis_limit=400")
+    conn.execute("PRAGMA optimize")
@@ -16,6 +16,8 @@ from __future__ import annotations
 import sqlite3
 from pathlib import Path
 
+from sqlite_utils import existing_columns, refresh_statistics, tune_connection
+
 ROOT = Path(__file__).resolve().parent.parent
 DB_PATH = ROOT / "instance" / "app.db"
 
@@ -31,26 +33,26 @@ COLUMNS = {
 }
 
 
-def column_exists(cursor: sqlite3.Cursor, table: str, column: str) -> bool:
-    cursor.execute(f"PRAGMA table_info({table})")
-    return any(row[1] == column for row in cursor.fetchall())
-
-
 def main() -> None:
     if not DB_PATH.exists():
         raise SystemExit(f"SQLite database not found at {DB_PATH}. Did you run the backend once?")
 
     conn = sqlite3.connect(DB_PATH)
+    tune_connection(conn)
     cursor = conn.cursor()
 
-    added = []
-    for column, definition in COLUMNS.items():
-        if column_exists(cursor, "message", column):
-            continue
-        cursor.execute(f"ALTER TABLE message ADD COLUMN {column} {definition}")
-        added.append(column)
+    existing = existing_columns(cursor, "message")
+    added = [column for column in COLUMNS if column not in existing]
+    if added:
+        # One script, one transaction: a single call into SQLite for all the ALTERs
+        cursor.executescript(
+            "BEGIN;\n"
+            + "".join(f"ALTER TABLE message ADD COLUMN {column} {COLUMNS[column]};\n" for column in added)
+            + "COMMIT;"
+        )
 
-    conn.commit()
+    if added:
+        refresh_statistics(conn)
     conn.close()
 
     if added: